@@ -0,0 +1,188 @@
+import os
+import time
+
+import numpy as np
+
+from decoding import counts_to_sparse, sparse_to_array
+from tracing import span
+
+# ===============================
+# CONFIG
+# ===============================
+SIM_METHODS = ("statevector", "matrix_product_state", "extended_stabilizer")
+
+# Statevector runs mcx/mcry/unitary natively, so the builders' circuits
+# need no transpiling. matrix_product_state (wide, low-entanglement NEQR
+# registers) and extended_stabilizer (Clifford+T) are picked per encoding
+# with methods=; their circuits are decomposed to the method's basis first.
+DEFAULT_METHODS = {
+    "frqi": "statevector",
+    "neqr": "statevector",
+    "qram": "statevector",
+    "mcqi": "statevector",
+    "amplitude": "statevector",
+}
+
+DEFAULT_SHOTS = 1024
+# Wider registers, and every matrix_product_state run, keep Aer's sparse
+# counts instead of 2^q bins per circuit
+SPARSE_COUNTS_QUBITS = 20
+MAX_MEMORY_MB = 0  # 0 lets Aer use all system memory
+
+# ===============================
+# EXECUTOR
+# ===============================
+class AerExecutor:
+    """
+    Runs a whole batch of circuits in one AerSimulator.run call.
+
+    Circuits are grouped by simulation method, measured if they have no
+    classical bits, transpiled (only those using gates the method lacks,
+    in one transpile call) and submitted together, so Aer spreads the
+    experiments over all cores (max_parallel_experiments=0) instead of
+    paying the Python dispatch cost per circuit. Results are collected
+    into a (B, 2^q) count histogram per group, or a list of sparse
+    (outcomes, counts) pairs for wide registers, and, with memory=True, a
+    (B, shots) array of integer outcomes.
+    """
+
+    def __init__(self, methods=None, shots=DEFAULT_SHOTS, seed=None,
+                 max_parallel_experiments=0, max_memory_mb=MAX_MEMORY_MB,
+                 memory=False, **options):
+        self.methods = dict(DEFAULT_METHODS, **(methods or {}))
+        for method in self.methods.values():
+            if method not in SIM_METHODS:
+                raise ValueError(f"Unknown simulation method: {method}")
+        self.shots = shots
+        self.seed = seed
+        self.memory = memory
+        self.options = dict(
+            max_parallel_experiments=max_parallel_experiments,
+            max_memory_mb=max_memory_mb,
+            **options,
+        )
+        self._simulators = {}
+
+    def simulator(self, method):
+        # One configured simulator per method, reused across batches
+        if method not in self._simulators:
+            from qiskit_aer import AerSimulator
+            self._simulators[method] = AerSimulator(method=method, **self.options)
+        return self._simulators[method]
+
+    def prepare(self, circuits, method):
+        """
+        Add measurements where missing, then transpile, in one call, the
+        circuits that use gates the method's simulator does not support.
+        """
+        from qiskit import transpile
+
+        simulator = self.simulator(method)
+        supported = set(simulator.configuration().basis_gates) | {"measure", "barrier"}
+        prepared, todo = [], []
+        for qc in circuits:
+            if qc.num_clbits == 0:
+                qc = qc.measure_all(inplace=False)
+            if not set(qc.count_ops()) <= supported:
+                todo.append(len(prepared))
+            prepared.append(qc)
+        if todo:
+            with span("transpile", items=len(todo), method=method):
+                done = transpile([prepared[i] for i in todo], simulator, optimization_level=0)
+            for i, qc in zip(todo, done):
+                prepared[i] = qc
+        return prepared
+
+    def run(self, circuits, method="statevector"):
+        """
+        Simulate circuits with one method in a single run call. Returns
+        {"counts": (B, 2^q), "memory": (B, shots) or None, "time": s};
+        circuits of different widths are padded to the widest. For
+        matrix_product_state, or above SPARSE_COUNTS_QUBITS, "counts" is a
+        list of (outcomes, counts) pairs instead, which the decoders take
+        as they are.
+        """
+        start = time.perf_counter()
+        prepared = self.prepare(circuits, method)
+        with span("simulator.run", items=len(prepared), method=method, shots=self.shots):
+            result = self.simulator(method).run(
+                prepared, shots=self.shots, seed_simulator=self.seed, memory=self.memory,
+            ).result()
+
+        width = max(qc.num_clbits for qc in prepared)
+        counts = [counts_to_sparse(result.get_counts(i)) for i in range(len(prepared))]
+        if method != "matrix_product_state" and width <= SPARSE_COUNTS_QUBITS:
+            counts = np.stack([sparse_to_array(pair, 1 << width) for pair in counts])
+        memory = None
+        if self.memory:
+            memory = np.array([[int(s.replace(" ", ""), 2) for s in result.get_memory(i)]
+                               for i in range(len(prepared))], dtype=np.int64)
+        return {"counts": counts, "memory": memory, "time": time.perf_counter() - start}
+
+    def run_encodings(self, circuits):
+        """
+        circuits maps encoding -> list of circuits. Encodings that share a
+        method go into the same run call. Returns encoding -> the run()
+        dict for its circuits, with "method" added.
+        """
+        groups = {}
+        for encoding, batch in circuits.items():
+            groups.setdefault(self.methods[encoding], []).append((encoding, list(batch)))
+
+        results = {}
+        for method, members in groups.items():
+            flat = [qc for _, batch in members for qc in batch]
+            out = self.run(flat, method)
+            offset = 0
+            for encoding, batch in members:
+                stop = offset + len(batch)
+                counts = out["counts"][offset:stop]
+                if isinstance(counts, np.ndarray):
+                    counts = counts[:, :1 << max(qc.num_qubits for qc in batch)]
+                results[encoding] = {
+                    "method": method,
+                    "counts": counts,
+                    "memory": None if out["memory"] is None else out["memory"][offset:stop],
+                    "time": out["time"],
+                }
+                offset = stop
+        return results
+
+
+if __name__ == "__main__":
+    from simulate import frqi_circuit, neqr_circuit
+
+    rng = np.random.default_rng(0)
+    images = rng.random((32, 4, 4))
+    circuits = {
+        "frqi": [frqi_circuit(img) for img in images],
+        "neqr": [neqr_circuit(img) for img in images],
+    }
+
+    from qiskit_aer import AerSimulator
+    serial = AerSimulator()
+    start = time.perf_counter()
+    for batch in circuits.values():
+        for qc in batch:
+            serial.run(qc.measure_all(inplace=False), shots=DEFAULT_SHOTS).result()
+    serial_time = time.perf_counter() - start
+
+    executor = AerExecutor(seed=0)
+    start = time.perf_counter()
+    results = executor.run_encodings(circuits)
+    batched_time = time.perf_counter() - start
+
+    for encoding, r in results.items():
+        print(f"{encoding}: {r['method']}, counts {r['counts'].shape}, "
+              f"shots per circuit {set(r['counts'].sum(axis=1).tolist())}")
+    print(f"{sum(map(len, circuits.values()))} circuits on {os.cpu_count()} cores: "
+          f"serial {serial_time:.2f} s, batched {batched_time:.2f} s")
+
+    # matrix_product_state keeps sparse counts; NEQR decodes them as they are
+    from decoding import decode_neqr
+    mps = AerExecutor({"neqr": "matrix_product_state"}, seed=0).run_encodings(
+        {"neqr": circuits["neqr"]})["neqr"]["counts"]
+    same = np.array_equal(decode_neqr(mps, (4, 4), 2),
+                          decode_neqr(results["neqr"]["counts"], (4, 4), 2))
+    print(f"neqr: matrix_product_state, {len(mps)} sparse histograms, "
+          f"decodes as the dense run: {same}")
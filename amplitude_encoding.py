@@ -1,18 +1,14 @@
-from qiskit import QuantumCircuit
 import numpy as np
 import matplotlib.pyplot as plt
 
+from amplitude_prep import amplitude_circuit
+
 # 2x2 image flattened
 image = np.array([0.2, 0.5, 0.7, 0.9])
 
-# Normalize the vector
-state = image / np.linalg.norm(image)
-
+# Partial-norm tree of RY rotations (normalization is implicit);
 # 2 qubits required for 4 amplitudes
-qc = QuantumCircuit(2)
-
-# Initialize amplitudes
-qc.initialize(state, [0, 1])
+qc = amplitude_circuit(image)
 
 # Draw, save, and show circuit
 qc.draw(output='mpl')
@@ -0,0 +1,178 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from metrics_evaluation import build_amplitude, build_mcqi, build_qram
+from preprocessing import DATASET_DIRS, find_images, preprocess_image
+from simulate import IMAGE_SIZE, frqi_circuit, neqr_circuit
+from tracing import merge, pool_initializer, span, traced_call
+
+# ===============================
+# ENCODERS
+# ===============================
+# encoding -> (builder, needs RGB input)
+ENCODERS = {
+    "frqi": (frqi_circuit, False),
+    "neqr": (neqr_circuit, False),
+    "qram": (build_qram, False),
+    "mcqi": (build_mcqi, True),
+    "amplitude": (build_amplitude, False),
+}
+
+DEFAULT_ENCODINGS = ("frqi", "neqr")
+
+_simulator = None
+_caches = {}
+
+
+def _get_simulator():
+    # One simulator per worker process, created on first use
+    global _simulator
+    if _simulator is None:
+        from qiskit_aer import AerSimulator
+        _simulator = AerSimulator()
+    return _simulator
+
+
+def _get_cache(cache_dir):
+    # One ImageCache per worker process, so its store size is scanned once
+    if cache_dir not in _caches:
+        from image_cache import ImageCache
+        _caches[cache_dir] = ImageCache(cache_dir)
+    return _caches[cache_dir]
+
+# ===============================
+# WORK ITEMS
+# ===============================
+def make_work_items(datasets, encodings=DEFAULT_ENCODINGS, size=IMAGE_SIZE,
+                    simulate=True, use_templates=False, cache_dir=None):
+    """
+    One (dataset, image, encoding) item per combination. datasets maps a
+    dataset name to an image path or a list of image paths. With cache_dir
+    workers share preprocessed images through an on-disk ImageCache.
+    """
+    items = []
+    for name, paths in datasets.items():
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        for path in paths:
+            for encoding in encodings:
+                items.append((name, str(path), encoding, size, simulate, use_templates, cache_dir))
+    return items
+
+
+def run_item(item):
+    """
+    Load, encode and optionally simulate one work item in a worker.
+    """
+    name, path, encoding, size, simulate, use_templates, cache_dir = item
+    builder, rgb = ENCODERS[encoding]
+    result = {"dataset": name, "path": path, "encoding": encoding}
+
+    try:
+        if cache_dir is not None:
+            img = _get_cache(cache_dir).load(path, size, rgb)
+        else:
+            img = preprocess_image(path, size, rgb)
+    except FileNotFoundError:
+        result["found"] = False
+        return result
+
+    start = time.perf_counter()
+    with span("build", items=1, encoding=encoding):
+        if use_templates:
+            from circuit_templates import encode
+            qc = encode(img, encoding)
+        else:
+            qc = builder(img)
+    result["build_time"] = time.perf_counter() - start
+
+    if simulate:
+        start = time.perf_counter()
+        with span("simulator.run", items=1, encoding=encoding):
+            _get_simulator().run(qc).result()
+        result["simulate_time"] = time.perf_counter() - start
+
+    result.update(found=True, depth=qc.depth(), qubits=qc.num_qubits, gates=qc.size())
+    return result
+
+# ===============================
+# RUNNER
+# ===============================
+def run_batch(items, workers=None, chunksize=1):
+    """
+    Spread work items over a process pool. Results come back in the
+    order of items regardless of which worker finished first.
+    """
+    with span("batch", items=len(items), workers=workers or os.cpu_count()):
+        if workers == 1:
+            return [run_item(item) for item in items]
+        with ProcessPoolExecutor(max_workers=workers, initializer=pool_initializer()) as pool:
+            results = []
+            for result, *trace in pool.map(partial(traced_call, run_item), items,
+                                           chunksize=chunksize):
+                merge(*trace)
+                results.append(result)
+            return results
+
+
+def write_summary(results, path="outputs/output.txt"):
+    """
+    Per-dataset summary lines in the format simulate.py writes. Datasets
+    with several images report the deepest circuit per encoding.
+    """
+    per_dataset = {}
+    for r in results:
+        per_dataset.setdefault(r["dataset"], []).append(r)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for name, rows in per_dataset.items():
+            found = [r for r in rows if r["found"]]
+            if not found:
+                f.write(f"{name}: Image not found\n")
+                continue
+
+            f.write(f"{name}:\n")
+            n_images = len({r["path"] for r in found})
+            if n_images > 1:
+                f.write(f"  Images: {n_images}\n")
+            encodings = list(dict.fromkeys(r["encoding"] for r in found))
+            for encoding in encodings:
+                enc_rows = [r for r in found if r["encoding"] == encoding]
+                label = encoding.upper() if encoding != "amplitude" else "Amplitude"
+                f.write(f"  {label} depth: {max(r['depth'] for r in enc_rows)}\n")
+                f.write(f"  {label} qubits: {max(r['qubits'] for r in enc_rows)}\n")
+            f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run dataset encodings on a process pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--size", type=int, default=IMAGE_SIZE)
+    parser.add_argument("--encodings", nargs="+", default=list(DEFAULT_ENCODINGS),
+                        choices=list(ENCODERS))
+    parser.add_argument("--no-simulate", action="store_true")
+    parser.add_argument("--templates", action="store_true",
+                        help="bind cached circuit templates instead of rebuilding")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="share preprocessed images through an on-disk cache")
+    parser.add_argument("--output", default="outputs/output.txt")
+    args = parser.parse_args()
+
+    # Whole dataset folders; a missing folder is reported as not found
+    datasets = {name: list(find_images(root)) or [root] for name, root in DATASET_DIRS.items()}
+    items = make_work_items(datasets, args.encodings, args.size,
+                            not args.no_simulate, args.templates, args.cache)
+    start = time.perf_counter()
+    results = run_batch(items, args.workers, args.chunksize)
+    write_summary(results, args.output)
+    print(f"{len(items)} work items on {args.workers} workers "
+          f"in {time.perf_counter() - start:.2f} s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
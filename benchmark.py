@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+
+import decoding
+
+RESULTS_PATH = os.path.join("results", "benchmark.json")
+BASELINE_PATH = os.path.join("results", "benchmark_baseline.json")
+STAGES = ("build", "transpile", "simulate", "decode")
+NEQR_BITS = 4
+MAX_SIM_QUBITS = 20
+
+# ===============================
+# DECODERS (statevector -> image)
+# ===============================
+def _decode_frqi(state, shape):
+    return decoding.decode_frqi(np.abs(state) ** 2, shape)
+
+
+def _decode_neqr(state, shape):
+    return decoding.decode_neqr(np.abs(state) ** 2, shape, NEQR_BITS)
+
+
+def _decode_amplitude(state, shape):
+    return decoding.decode_amplitude(np.abs(state) ** 2, shape)
+
+
+def _decode_mcqi(state, shape):
+    return decoding.decode_mcqi(np.abs(state) ** 2, shape[:2])
+
+# ===============================
+# ENCODERS UNDER TEST
+# ===============================
+def _frqi_ucr(image):
+    from frqi_compiler import frqi_ucr_circuit
+    return frqi_ucr_circuit(image)
+
+
+def _frqi_mcry(image):
+    from simulate import frqi_circuit
+    return frqi_circuit(image)
+
+
+def _neqr(image):
+    from simulate import neqr_circuit
+    return neqr_circuit(image, NEQR_BITS)
+
+
+def _neqr_opt(image):
+    from neqr_optimizer import neqr_optimized_circuit
+    return neqr_optimized_circuit(image, NEQR_BITS)
+
+
+def _qram(image):
+    from metrics_evaluation import build_qram
+    return build_qram(image)
+
+
+def _mcqi(image):
+    from metrics_evaluation import build_mcqi
+    return build_mcqi(image)
+
+
+def _amplitude(image):
+    from metrics_evaluation import build_amplitude
+    return build_amplitude(image)
+
+
+def _ha_qir(image):
+    from ha_qir import encode
+    return encode(image, "otsu")
+
+
+def _decode_ha_qir(encoded, shape):
+    return encoded.reconstruct()[0]
+
+
+# name -> build, decode, whether build returns a circuit, RGB input, max side
+ENCODERS = {
+    "frqi": dict(build=_frqi_ucr, decode=_decode_frqi, circuit=True, rgb=False, max_size=64),
+    "frqi_mcry": dict(build=_frqi_mcry, decode=_decode_frqi, circuit=True, rgb=False, max_size=8),
+    "neqr": dict(build=_neqr, decode=_decode_neqr, circuit=True, rgb=False, max_size=16),
+    "neqr_opt": dict(build=_neqr_opt, decode=_decode_neqr, circuit=True, rgb=False, max_size=16),
+    "qram": dict(build=_qram, decode=None, circuit=True, rgb=False, max_size=32),
+    "mcqi": dict(build=_mcqi, decode=_decode_mcqi, circuit=True, rgb=True, max_size=64),
+    "amplitude": dict(build=_amplitude, decode=_decode_amplitude, circuit=True, rgb=False, max_size=64),
+    "ha_qir": dict(build=_ha_qir, decode=_decode_ha_qir, circuit=False, rgb=False, max_size=4096),
+}
+
+# ===============================
+# MEASUREMENT
+# ===============================
+def measure(fn, arg, warmup, repeats):
+    """
+    Time fn(arg) after warmup calls, then run it once more under
+    tracemalloc for the peak Python-side allocation. Returns the last
+    output and the timing summary.
+    """
+    for _ in range(warmup):
+        fn(arg)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn(arg)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = np.array(times)
+    return out, {
+        "repeats": repeats,
+        "min": float(times.min()),
+        "mean": float(times.mean()),
+        "p50": float(np.percentile(times, 50)),
+        "p90": float(np.percentile(times, 90)),
+        "p99": float(np.percentile(times, 99)),
+        "peak_kib": peak / 1024,
+    }
+
+
+def bench_encoder(name, size, warmup=1, repeats=5, seed=0):
+    """
+    {stage: timing} for one encoder at size x size. Stages that do not
+    apply (no circuit, too many qubits to simulate, no decoder) are left
+    out.
+    """
+    from qiskit import transpile
+    from qiskit_aer import AerSimulator
+
+    spec = ENCODERS[name]
+    rng = np.random.default_rng(seed)
+    shape = (size, size, 3) if spec["rgb"] else (size, size)
+    image = rng.uniform(0.05, 1.0, shape)
+
+    stages = {}
+    encoded, stages["build"] = measure(spec["build"], image, warmup, repeats)
+    if not spec["circuit"]:
+        if spec["decode"] is not None:
+            _, stages["decode"] = measure(lambda e: spec["decode"](e, shape), encoded,
+                                          warmup, repeats)
+        return stages
+
+    simulator = AerSimulator(method="statevector")
+    qc = encoded.copy()
+    qc.save_statevector()
+    compiled, stages["transpile"] = measure(lambda c: transpile(c, simulator), qc,
+                                            warmup, repeats)
+    if qc.num_qubits > MAX_SIM_QUBITS:
+        return stages
+
+    result, stages["simulate"] = measure(lambda c: simulator.run(c).result(), compiled,
+                                         warmup, repeats)
+    if spec["decode"] is not None:
+        state = np.asarray(result.get_statevector())
+        _, stages["decode"] = measure(lambda s: spec["decode"](s, shape), state,
+                                      warmup, repeats)
+    return stages
+
+
+def run_suite(encoders=tuple(ENCODERS), sizes=(2, 4, 8, 16), warmup=1, repeats=5):
+    results = {}
+    for name in encoders:
+        for size in sizes:
+            if size > ENCODERS[name]["max_size"]:
+                continue
+            for stage, timing in bench_encoder(name, size, warmup, repeats).items():
+                key = f"{name}/{size}x{size}/{stage}"
+                results[key] = timing
+                print(f"{key:<28} p50 {timing['p50'] * 1e3:10.3f} ms  "
+                      f"p90 {timing['p90'] * 1e3:10.3f} ms  peak {timing['peak_kib']:10.1f} KiB")
+    return results
+
+
+def environment():
+    import qiskit
+    import qiskit_aer
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "qiskit": qiskit.__version__,
+        "qiskit_aer": qiskit_aer.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+# ===============================
+# BASELINE COMPARISON
+# ===============================
+def compare(results, baseline, tolerance=0.25, min_delta=1e-3):
+    """
+    Keys whose p50 grew by more than tolerance (relative) and min_delta
+    seconds (absolute, to ignore timer noise on microsecond stages).
+    """
+    regressions = []
+    for key, timing in results.items():
+        if key not in baseline:
+            continue
+        old, new = baseline[key]["p50"], timing["p50"]
+        if new > old * (1 + tolerance) and new - old > min_delta:
+            regressions.append((key, old, new))
+    return regressions
+
+
+def save(results, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image encoders stage by stage")
+    parser.add_argument("--encoders", nargs="+", default=list(ENCODERS), choices=list(ENCODERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[2, 4, 8, 16])
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    results = run_suite(args.encoders, args.sizes, args.warmup, args.repeats)
+    save(results, args.output)
+    print(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        save(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print("\nPERFORMANCE REGRESSION")
+        for key, old, new in regressions:
+            print(f"  {key}: {old * 1e3:.3f} ms -> {new * 1e3:.3f} ms ({new / old:.2f}x)")
+        sys.exit(1)
+    print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
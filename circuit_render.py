@@ -0,0 +1,193 @@
+import os
+import shutil
+import hashlib
+import numbers
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from tracing import merge, pool_initializer, span, traced_call
+
+RENDER_CACHE_DIR = os.path.join("cache", "renders")
+MAX_RENDER_GATES = 400
+RENDER_WORKERS = 2
+RENDER_VERSION = 1  # bump to invalidate cached renders
+
+# mkstemp creates 0600 files; renders are made readable like open()'s
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o644 & ~_UMASK
+
+# ===============================
+# STRUCTURAL HASH
+# ===============================
+def _format_param(p, precision):
+    if isinstance(p, numbers.Number):
+        return format(p, f".{precision}g")
+    return str(p)
+
+
+def structural_hash(qc, precision=10):
+    """
+    Hash of everything the drawer shows: register sizes and, in order,
+    each gate's name, wires and parameters (to precision significant
+    digits). Circuits with equal hashes draw identical images.
+    """
+    h = hashlib.sha1(f"v{RENDER_VERSION}|{qc.num_qubits}|{qc.num_clbits}".encode())
+    for inst in qc.data:
+        qubits = ",".join(str(qc.find_bit(q).index) for q in inst.qubits)
+        clbits = ",".join(str(qc.find_bit(c).index) for c in inst.clbits)
+        params = ",".join(_format_param(p, precision) for p in inst.operation.params)
+        h.update(f";{inst.operation.name}|{qubits}|{clbits}|{params}".encode())
+    return h.hexdigest()
+
+
+def text_summary(qc):
+    ops = ", ".join(f"{name}: {count}" for name, count in qc.count_ops().items())
+    return (
+        f"Circuit too large to draw ({qc.size()} gates)\n"
+        f"Qubits: {qc.num_qubits}\n"
+        f"Depth: {qc.depth()}\n"
+        f"Gates: {ops}\n"
+    )
+
+# ===============================
+# RENDERING (runs in worker processes)
+# ===============================
+def _write_replace(path, write):
+    # write(tmp) into a temp file beside path, then rename it over path so
+    # readers (and _publish's links) never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                               suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        os.chmod(tmp, FILE_MODE)
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return path
+
+
+def _write_text(text):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            f.write(text)
+    return write
+
+
+def _render_to_cache(qc, base, max_gates):
+    """
+    Draw qc to base + ".png", or write base + ".txt" when it has more than
+    max_gates gates. Returns the path written.
+    """
+    if qc.size() > max_gates:
+        return _write_replace(base + ".txt", _write_text(text_summary(qc)))
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    with span("circuit_drawer", items=1):
+        fig = qc.draw("mpl")
+    try:
+        with span("savefig", items=1):
+            return _write_replace(base + ".png", fig.savefig)
+    finally:
+        plt.close(fig)
+
+
+def _publish(cached, filename):
+    # Give filename the cached image's extension (.png or the .txt fallback)
+    target = os.path.splitext(filename)[0] + os.path.splitext(cached)[1]
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(cached, target)
+    except OSError:
+        shutil.copyfile(cached, target)
+    return target
+
+# ===============================
+# RENDERER
+# ===============================
+class Renderer:
+    """
+    Deferred, deduplicated circuit rendering.
+
+    submit() returns at once. A circuit whose structural hash already has
+    a render in cache_dir is copied from there. Otherwise its render is
+    queued on a background process pool, and later submissions of the
+    same structure wait on that one render. Circuits above max_gates get
+    a text summary instead of a drawing. close() (or leaving the with
+    block) waits for the queue and writes every requested file.
+    With workers=0 everything renders in-process.
+    """
+
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_gates=MAX_RENDER_GATES,
+                 workers=RENDER_WORKERS):
+        self.cache_dir = cache_dir
+        self.max_gates = max_gates
+        self.pool = None
+        if workers:
+            self.pool = ProcessPoolExecutor(max_workers=workers,
+                                            initializer=pool_initializer())
+        self.pending = {}
+        self.rendered = 0
+        self.reused = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cached(self, base):
+        for ext in (".png", ".txt"):
+            if os.path.exists(base + ext):
+                return base + ext
+        return None
+
+    def submit(self, qc, filename):
+        with span("render.hash", items=1):
+            base = os.path.join(self.cache_dir, structural_hash(qc))
+        cached = self._cached(base)
+        if cached is not None:
+            self.reused += 1
+            return _publish(cached, filename)
+        if base in self.pending:
+            self.reused += 1
+            self.pending[base][1].append(filename)
+            return None
+
+        self.rendered += 1
+        if self.pool is None:
+            return _publish(_render_to_cache(qc, base, self.max_gates), filename)
+        future = self.pool.submit(traced_call, _render_to_cache, qc, base, self.max_gates)
+        self.pending[base] = (future, [filename])
+        return None
+
+    def close(self):
+        # A failed render still releases the pool and the queue
+        try:
+            with span("render.wait", items=len(self.pending)):
+                for future, filenames in self.pending.values():
+                    cached, *trace = future.result()
+                    merge(*trace)
+                    for filename in filenames:
+                        _publish(cached, filename)
+        finally:
+            self.pending.clear()
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+                self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_circuit(qc, filename, cache_dir=RENDER_CACHE_DIR, max_gates=MAX_RENDER_GATES):
+    """
+    Render one circuit synchronously, reusing a cached render if present.
+    """
+    renderer = Renderer(cache_dir, max_gates, workers=0)
+    return renderer.submit(qc, filename)
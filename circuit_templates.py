@@ -0,0 +1,230 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+from qiskit import QuantumCircuit, transpile
+from qiskit.circuit import ParameterVector
+
+from amplitude_prep import tree_angles
+from frqi_compiler import BASIS_GATES, frqi_angles, ucr_angles, ucr_ladder
+from frqi_statevector import bit_reverse_indices, position_qubits
+from neqr_sparse import quantize
+
+TEMPLATE_CACHE_SIZE = 32
+
+# ===============================
+# TEMPLATE
+# ===============================
+class CircuitTemplate:
+    """
+    Circuit structure for one (encoding, size), built once with
+    ParameterVector angles and transpiled once. Encoding an image only
+    computes its angles and binds them.
+    """
+
+    def __init__(self, encoding, size, circuit, params, angle_fn,
+                 basis_gates=BASIS_GATES, optimization_level=1):
+        self.encoding = encoding
+        self.size = size
+        self.circuit = circuit
+        self.params = params
+        self.angle_fn = angle_fn
+        self.transpiled = transpile(
+            circuit, basis_gates=basis_gates, optimization_level=optimization_level
+        )
+
+    def angles(self, image):
+        return self.angle_fn(np.asarray(image))
+
+    def bind(self, image, transpiled=True):
+        qc = self.transpiled if transpiled else self.circuit
+        values = [float(v) for v in self.angles(image)]
+        return qc.assign_parameters({self.params: values}, strict=False)
+
+# ===============================
+# ANGLE FUNCTIONS
+# ===============================
+def _frqi_values(image):
+    return ucr_angles(frqi_angles(image))
+
+
+def _neqr_values(image, n_bits):
+    n_pos_qubits = position_qubits(image.size)
+    codes = quantize(image.flatten(), n_bits)[bit_reverse_indices(n_pos_qubits)]
+    bits = (codes[np.newaxis, :] >> np.arange(n_bits)[:, np.newaxis]) & 1
+    return ucr_angles(bits * np.pi).ravel()
+
+
+def _qram_values(image):
+    n_addr = position_qubits(image.size)
+    angles = 2 * np.arcsin(np.asarray(image, dtype=np.float64).flatten())
+    return ucr_angles(angles[bit_reverse_indices(n_addr)])
+
+
+def _mcqi_values(image):
+    from mcqi import mcqi_angles
+    return ucr_angles(mcqi_angles(image))
+
+
+def amplitude_tree_angles(vec):
+    """
+    RY angles of the partial-norm tree that prepares the nonnegative real
+    state vec / |vec|, level by level from the top qubit down. Level k
+    holds one angle per value of the qubits above k.
+    """
+    return tree_angles(np.abs(np.asarray(vec, dtype=np.float64).ravel()))[0]
+
+
+def _amplitude_values(image):
+    return np.concatenate([ucr_angles(a) for a in amplitude_tree_angles(image)])
+
+# ===============================
+# TEMPLATE BUILDERS
+# ===============================
+def _frqi_template(size):
+    n_pos_qubits = position_qubits(size * size)
+    params = ParameterVector("phi", 1 << n_pos_qubits)
+    qc = QuantumCircuit(n_pos_qubits + 1)
+    for i in range(n_pos_qubits):
+        qc.h(i)
+    ucr_ladder(qc, "y", list(params), range(n_pos_qubits), n_pos_qubits)
+    return qc, params, _frqi_values
+
+
+def _neqr_template(size, n_bits):
+    n_pos_qubits = position_qubits(size * size)
+    n_pixels = 1 << n_pos_qubits
+    params = ParameterVector("phi", n_bits * n_pixels)
+    qc = QuantumCircuit(n_pos_qubits + n_bits)
+    for i in range(n_pos_qubits):
+        qc.h(i)
+    # RY(pi) writes |1> exactly, so each intensity qubit is one
+    # uniformly controlled rotation with angles 0 or pi
+    for bit in range(n_bits):
+        phis = list(params[bit * n_pixels:(bit + 1) * n_pixels])
+        ucr_ladder(qc, "y", phis, range(n_pos_qubits), n_pos_qubits + bit)
+    return qc, params, lambda image: _neqr_values(image, n_bits)
+
+
+def _qram_template(size):
+    # Address qubits control the data qubit, as in qram.QRAM.circuit
+    n_addr = position_qubits(size * size)
+    params = ParameterVector("theta", 1 << n_addr)
+    qc = QuantumCircuit(n_addr + 1)
+    for i in range(n_addr):
+        qc.h(i)
+    ucr_ladder(qc, "y", list(params), range(n_addr), n_addr)
+    return qc, params, _qram_values
+
+
+def _mcqi_template(size):
+    # Position and channel qubits control the colour qubit
+    n_controls = position_qubits(size * size) + 2
+    params = ParameterVector("phi", 1 << n_controls)
+    qc = QuantumCircuit(n_controls + 1)
+    for i in range(n_controls):
+        qc.h(i)
+    ucr_ladder(qc, "y", list(params), range(n_controls), n_controls)
+    return qc, params, _mcqi_values
+
+
+def _amplitude_template(size):
+    n_qubits = position_qubits(size * size)
+    params = ParameterVector("phi", (1 << n_qubits) - 1)
+    qc = QuantumCircuit(n_qubits)
+    offset = 0
+    for k in range(n_qubits - 1, -1, -1):
+        width = 1 << (n_qubits - 1 - k)
+        ucr_ladder(qc, "y", list(params[offset:offset + width]),
+                   range(k + 1, n_qubits), k)
+        offset += width
+    return qc, params, _amplitude_values
+
+
+TEMPLATE_BUILDERS = {
+    "frqi": _frqi_template,
+    "neqr": _neqr_template,
+    "qram": _qram_template,
+    "mcqi": _mcqi_template,
+    "amplitude": _amplitude_template,
+}
+
+# ===============================
+# CACHE
+# ===============================
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _cached_template(encoding, size, n_bits, optimization_level):
+    if encoding not in TEMPLATE_BUILDERS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    if encoding == "neqr":
+        qc, params, angle_fn = _neqr_template(size, n_bits)
+    else:
+        qc, params, angle_fn = TEMPLATE_BUILDERS[encoding](size)
+    return CircuitTemplate(
+        encoding, size, qc, params, angle_fn, optimization_level=optimization_level
+    )
+
+
+def get_template(encoding, size, n_bits=2, optimization_level=1):
+    """
+    Cached template for an encoding of size x size images. n_bits only
+    matters for NEQR. Least recently used templates are evicted once
+    TEMPLATE_CACHE_SIZE are held.
+    """
+    # One positional key per template, however the caller spelled it
+    return _cached_template(encoding, size, n_bits if encoding == "neqr" else None,
+                            optimization_level)
+
+
+def encode(image, encoding, n_bits=2, transpiled=True, optimization_level=1):
+    """
+    Bound circuit for image from the cached template of its size.
+    """
+    size = image.shape[0]
+    return get_template(encoding, size, n_bits, optimization_level).bind(image, transpiled)
+
+
+if __name__ == "__main__":
+    from qiskit.quantum_info import Statevector
+    from frqi_statevector import frqi_statevector
+    from metrics_evaluation import build_amplitude, build_mcqi, build_qram
+    from neqr_sparse import SparseNEQRState
+
+    rng = np.random.default_rng(0)
+    gray = rng.random((2, 2))
+    rgb = rng.random((2, 2, 3))
+
+    def state(qc):
+        return Statevector(qc).data
+
+    checks = {
+        "frqi": (encode(gray, "frqi"), frqi_statevector(gray)),
+        "neqr": (encode(gray, "neqr", n_bits=3), SparseNEQRState.from_images(gray, 3).to_dense()[0]),
+        "qram": (encode(gray, "qram"), state(build_qram(gray))),
+        "mcqi": (encode(rgb, "mcqi"), state(build_mcqi(rgb))),
+        "amplitude": (encode(gray, "amplitude"), state(build_amplitude(gray))),
+    }
+    for name, (qc, ref) in checks.items():
+        print(f"{name:<10} max |template - reference| = {np.max(np.abs(state(qc) - ref)):.2e}")
+
+    images = rng.random((200, 16, 16))
+    for encoding in ("frqi", "amplitude"):
+        start = time.time()
+        get_template(encoding, 16)
+        built = time.time() - start
+        start = time.time()
+        for img in images:
+            encode(img, encoding)
+        bound = time.time() - start
+        print(f"{encoding:<10} 16x16 template built+transpiled once in {built:.3f} s, "
+              f"{len(images)} images bound in {bound:.3f} s")
+    # Keyword, positional and ignored n_bits all share one entry
+    _cached_template.cache_clear()
+    img = images[0]
+    encode(img, "frqi")
+    encode(img, "frqi", 3)
+    get_template("frqi", 16)
+    get_template("frqi", size=16, optimization_level=1)
+    info = _cached_template.cache_info()
+    assert (info.hits, info.misses) == (3, 1), info
+    print(info)
@@ -0,0 +1,262 @@
+import os
+import sys
+import time
+import argparse
+
+# Only the standard library is imported here. numpy, qiskit, qiskit_aer,
+# cv2 and matplotlib are imported inside the commands that use them, so
+# `cli.py metrics` or a worker spawned for one job does not pay for
+# AerSimulator or the matplotlib backend.
+
+HEAVY_MODULES = ("qiskit", "qiskit_aer", "cv2", "matplotlib")
+STARTUP_BUDGET = 0.5  # seconds, process start to exit, for the light commands
+LIGHT_COMMANDS = (
+    ("metrics", "--size", "64"),
+    ("compare", "--sizes", "8", "64", "512"),
+)
+ENCODINGS = ("frqi", "neqr", "qram", "mcqi", "amplitude")
+
+# ===============================
+# HELPERS
+# ===============================
+def _load(path, size, encoding):
+    from preprocessing import preprocess_image
+    return preprocess_image(path, size, rgb=(encoding == "mcqi"))
+
+
+def _build(image, encoding, templates=False):
+    from tracing import span
+    if templates:
+        from circuit_templates import encode
+        with span("build", items=1, encoding=encoding):
+            return encode(image, encoding)
+    from batch_runner import ENCODERS
+    with span("build", items=1, encoding=encoding):
+        return ENCODERS[encoding][0](image)
+
+# ===============================
+# COMMANDS
+# ===============================
+def cmd_encode(args):
+    for path in args.images:
+        for encoding in args.encodings:
+            qc = _build(_load(path, args.size, encoding), encoding, args.templates)
+            if args.optimize:
+                from circuit_peephole import optimize
+                qc = optimize(qc)
+            print(f"{path} {encoding.upper()}: qubits {qc.num_qubits}, "
+                  f"gates {qc.size()}, depth {qc.depth()}")
+
+
+def cmd_simulate(args):
+    import numpy as np
+    import decoding
+    from tracing import span
+
+    images = [_load(path, args.size, args.encoding) for path in args.images]
+    if args.method == "sampler":
+        import shot_sampler
+        with span("sample", items=len(images), encoding=args.encoding, shots=args.shots):
+            histograms = [shot_sampler.sample(args.encoding, img, args.shots, args.seed,
+                                              args.n_bits)
+                          for img in images]
+    else:
+        # Every image in one batched Aer run
+        from aer_executor import AerExecutor
+        from circuit_templates import encode
+        executor = AerExecutor({args.encoding: args.aer_method}, args.shots, args.seed)
+        with span("build", items=len(images), encoding=args.encoding):
+            circuits = [encode(img, args.encoding, args.n_bits) for img in images]
+        histograms = executor.run_encodings({args.encoding: circuits})[args.encoding]["counts"]
+
+    for path, img, counts in zip(args.images, images, histograms):
+        reference = img
+        if args.encoding == "frqi":
+            decoded = decoding.decode_frqi(counts, img.shape)
+        elif args.encoding == "neqr":
+            decoded = decoding.decode_neqr(counts, img.shape, args.n_bits)
+        elif args.encoding == "mcqi":
+            # Score the channels as separate images
+            reference = np.moveaxis(img, -1, 0)
+            decoded = np.moveaxis(decoding.decode_mcqi(counts, img.shape[:2]), -1, 0)
+        else:
+            reference = img / max(float((img ** 2).sum()) ** 0.5, 1e-12)
+            decoded = decoding.decode_amplitude(counts, img.shape)
+        report = decoding.fidelity_report(reference, decoded)
+        print(f"{path} {args.encoding.upper()} {args.shots} shots ({args.method}): "
+              f"psnr {report['psnr'].mean():.2f} dB, ssim {report['ssim'].mean():.4f}")
+
+
+def cmd_metrics(args):
+    from resource_estimator import estimate
+
+    print(f"{'encoding':<12} {'qubits':>6} {'gates':>14} {'basis gates':>14} {'depth':>14}")
+    for encoding in args.encodings:
+        r = estimate(encoding, args.size, args.n_bits)
+        print(f"{encoding:<12} {r['qubits']:>6} {r['gates']:>14} "
+              f"{r['basis_gates']:>14} {r['basis_depth']:>14}")
+
+    if args.image:
+        import decoding
+        from generate_outputs import MODELS
+        img = _load(args.image, args.size, "frqi")
+        for name, model in MODELS.items():
+            report = decoding.fidelity_report(img, model(img))
+            print(f"{name:<12} classical model: psnr {report['psnr'][0]:.2f} dB, "
+                  f"ssim {report['ssim'][0]:.4f}")
+
+
+def cmd_render(args):
+    from circuit_render import Renderer
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with Renderer(max_gates=args.max_gates) as renderer:
+        for path in args.images:
+            # Dataset folders reuse file names (img1.png), so keep the folder
+            folder = os.path.basename(os.path.dirname(os.path.abspath(path)))
+            name = f"{folder}_{os.path.splitext(os.path.basename(path))[0]}"
+            for encoding in args.encodings:
+                qc = _build(_load(path, args.size, encoding), encoding)
+                renderer.submit(qc, os.path.join(args.output_dir, f"{encoding}_{name}.png"))
+    print(f"Rendered {renderer.rendered}, reused {renderer.reused}")
+
+
+def cmd_compare(args):
+    from resource_estimator import estimate
+
+    header = "".join(f"{s:>10}x{s:<5}" for s in args.sizes)
+    print(f"{'basis gates':<12} {header}")
+    rows = {}
+    for encoding in args.encodings:
+        rows[encoding] = [estimate(encoding, s, args.n_bits)["basis_gates"] for s in args.sizes]
+        print(f"{encoding:<12} " + "".join(f"{g:>16}" for g in rows[encoding]))
+
+    if args.plot:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        for encoding, gates in rows.items():
+            plt.plot(args.sizes, gates, marker="o", label=encoding.upper())
+        plt.xscale("log", base=2)
+        plt.yscale("log")
+        plt.xlabel("Image side (pixels)")
+        plt.ylabel("Gates after decomposition to cx + u")
+        plt.legend()
+        plt.savefig(args.plot, dpi=150, bbox_inches="tight")
+        print(f"Plot saved to {args.plot}")
+
+
+def cmd_startup(args):
+    """
+    Run each light command in a fresh interpreter and check it against
+    STARTUP_BUDGET and for heavy imports.
+    """
+    import subprocess
+
+    env = dict(os.environ, QIR_IMPORT_CHECK="1")
+    failed = False
+    for command in LIGHT_COMMANDS:
+        times, heavy = [], ""
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, __file__, *command], env=env,
+                                  capture_output=True, text=True)
+            times.append(time.perf_counter() - start)
+            for line in proc.stderr.splitlines():
+                if line.startswith("heavy imports:"):
+                    heavy = line.split(":", 1)[1].strip()
+        best = min(times)
+        ok = best <= args.budget and not heavy and proc.returncode == 0
+        failed |= not ok
+        print(f"{' '.join(command):<28} {best * 1e3:8.1f} ms "
+              f"(budget {args.budget * 1e3:.0f} ms)  heavy imports: {heavy or 'none'}  "
+              f"{'ok' if ok else 'OVER BUDGET'}")
+    sys.exit(1 if failed else 0)
+
+# ===============================
+# ENTRY POINT
+# ===============================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Quantum image representation toolkit")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record stage spans and write a Chrome trace to FILE")
+    parser.add_argument("--trace-summary", action="store_true",
+                        help="print the per-stage table without writing a trace")
+    parser.add_argument("--profile", metavar="STAGE",
+                        help="run every span of STAGE (e.g. transpile) under cProfile")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("encode", help="build circuits and print their size")
+    p.add_argument("images", nargs="+")
+    p.add_argument("--encodings", nargs="+", default=["frqi", "neqr"], choices=ENCODINGS)
+    p.add_argument("--size", type=int, default=2)
+    p.add_argument("--templates", action="store_true", help="bind cached circuit templates")
+    p.add_argument("--optimize", action="store_true", help="run the peephole pass")
+    p.set_defaults(func=cmd_encode)
+
+    p = sub.add_parser("simulate", help="sample shots and report decoding fidelity")
+    p.add_argument("images", nargs="+")
+    p.add_argument("--encoding", default="frqi", choices=("frqi", "neqr", "mcqi", "amplitude"))
+    p.add_argument("--size", type=int, default=8)
+    p.add_argument("--shots", type=int, default=100_000)
+    p.add_argument("--n-bits", type=int, default=2)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--method", default="sampler", choices=("sampler", "aer"),
+                   help="closed-form NumPy sampler or AerSimulator")
+    p.add_argument("--aer-method", default="statevector",
+                   choices=("statevector", "matrix_product_state", "extended_stabilizer"))
+    p.set_defaults(func=cmd_simulate)
+
+    p = sub.add_parser("metrics", help="resource estimates, optionally classical model fidelity")
+    p.add_argument("--encodings", nargs="+", default=list(ENCODINGS))
+    p.add_argument("--size", type=int, default=2)
+    p.add_argument("--n-bits", type=int, default=2)
+    p.add_argument("--image", help="also score generate_outputs.MODELS on this image")
+    p.set_defaults(func=cmd_metrics)
+
+    p = sub.add_parser("render", help="draw circuits (deduplicated, in the background)")
+    p.add_argument("images", nargs="+")
+    p.add_argument("--encodings", nargs="+", default=["frqi", "neqr"], choices=ENCODINGS)
+    p.add_argument("--size", type=int, default=2)
+    p.add_argument("--output-dir", default="outputs")
+    p.add_argument("--max-gates", type=int, default=400)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("compare", help="gate counts of every encoding across sizes")
+    p.add_argument("--encodings", nargs="+", default=list(ENCODINGS))
+    p.add_argument("--sizes", nargs="+", type=int, default=[2, 8, 32, 128])
+    p.add_argument("--n-bits", type=int, default=2)
+    p.add_argument("--plot", help="save a log-log plot to this path")
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("startup", help="check light commands against the startup budget")
+    p.add_argument("--budget", type=float, default=STARTUP_BUDGET)
+    p.add_argument("--repeats", type=int, default=3)
+    p.set_defaults(func=cmd_startup)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tracing = None
+    if args.trace or args.trace_summary or args.profile:
+        import tracing
+        if os.environ.get(tracing.TRACE_ENV):
+            # Already recording since import, and reported at exit
+            if args.profile:
+                tracing.get_tracer().profile = args.profile
+        else:
+            tracing.enable(args.profile)
+    args.func(args)
+    if tracing is not None:
+        if not os.environ.get(tracing.TRACE_ENV):
+            tracing.report(args.trace)
+        elif args.trace:
+            tracing.export_chrome(args.trace)
+    if os.environ.get("QIR_IMPORT_CHECK"):
+        loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+        print(f"heavy imports: {','.join(loaded)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
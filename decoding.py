@@ -0,0 +1,245 @@
+import numpy as np
+from math import pi
+
+from frqi_statevector import bit_reverse_indices, position_qubits
+from precision import real_dtype
+
+# ===============================
+# COUNTS
+# ===============================
+def counts_to_sparse(counts):
+    """
+    Qiskit {bitstring: count} dict -> (outcomes, counts) int64 arrays: a
+    sparse histogram, for registers too wide to hold all 2^q bins.
+    """
+    keys = np.fromiter((int(k.replace(" ", ""), 2) for k in counts), dtype=np.int64,
+                       count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    return keys, values
+
+
+def sparse_to_array(sparse, size):
+    """
+    (outcomes, counts) -> dense histogram of length size.
+    """
+    keys, values = sparse
+    return np.bincount(keys, weights=values, minlength=size).astype(np.int64)
+
+
+def counts_to_array(counts, num_qubits):
+    """
+    Qiskit {bitstring: count} dict -> dense histogram of length 2^q.
+    Only the distinct keys are parsed; the histogram is a bincount.
+    """
+    return sparse_to_array(counts_to_sparse(counts), 1 << num_qubits)
+
+
+def outcomes_to_counts(outcomes, num_qubits):
+    """
+    Per-shot integer outcomes, shape (shots,) or (B, shots) -> histograms
+    of shape (2^q,) or (B, 2^q).
+    """
+    outcomes = np.asarray(outcomes, dtype=np.int64)
+    size = 1 << num_qubits
+    if outcomes.ndim == 1:
+        return np.bincount(outcomes, minlength=size)
+    offsets = np.arange(outcomes.shape[0])[:, np.newaxis] * size
+    flat = np.bincount((outcomes + offsets).ravel(), minlength=outcomes.shape[0] * size)
+    return flat.reshape(outcomes.shape[0], size)
+
+# ===============================
+# DECODERS
+# ===============================
+# Every decoder takes a histogram over the full register (shot counts or
+# exact probabilities |ψ|^2), shape (2^q,) or (B, 2^q), or a sparse
+# (outcomes, counts) pair or list of pairs (aer_executor's wide runs), and
+# returns images of shape (H, W) or (B, H, W) in the precision policy's
+# real dtype.
+def _sparse(hist):
+    # (pairs, single) for sparse histograms, else None
+    if isinstance(hist, tuple) and len(hist) == 2:
+        return [hist], True
+    if isinstance(hist, list) and hist and isinstance(hist[0], tuple):
+        return hist, False
+    return None
+
+
+def _split(hist, size):
+    # Dense (B, size) histograms; sparse ones are densified here
+    sparse = _sparse(hist)
+    if sparse is not None:
+        pairs, single = sparse
+        batch = np.stack([sparse_to_array(pair, size) for pair in pairs]).astype(real_dtype())
+        return batch, single
+    hist = np.asarray(hist, dtype=real_dtype())
+    return hist.reshape(-1, hist.shape[-1]), hist.ndim == 1
+
+
+def _to_images(pixels, shape, single):
+    images = pixels.reshape((-1,) + tuple(shape))
+    return images[0] if single else images
+
+
+def decode_frqi(hist, shape):
+    """
+    FRQI: θ_i = atan(sqrt(n1 / n0)) per position, pixel = θ_i / (pi/2).
+    Positions that received no shots decode to 0.
+    """
+    n_pixels = shape[0] * shape[1]
+    batch, single = _split(hist, 2 * n_pixels)
+    theta = np.arctan2(np.sqrt(batch[:, n_pixels:]), np.sqrt(batch[:, :n_pixels]))
+    pixels = theta[:, bit_reverse_indices(position_qubits(n_pixels))] / batch.dtype.type(pi / 2)
+    return _to_images(pixels, shape, single)
+
+
+def decode_neqr(hist, shape, n_bits):
+    """
+    NEQR: the most frequent intensity code seen at each position (the
+    lowest on ties, 0 where no shots landed). Sparse histograms are
+    decoded as they are, without the 2^n_bits bins per position.
+    """
+    n_pixels = shape[0] * shape[1]
+    sparse = _sparse(hist)
+    if sparse is not None:
+        pairs, single = sparse
+        codes = np.stack([_top_codes(outcomes, counts, n_pixels) for outcomes, counts in pairs])
+    else:
+        batch, single = _split(hist, n_pixels << n_bits)
+        per_code = batch.reshape(batch.shape[0], 1 << n_bits, n_pixels)
+        codes = np.argmax(per_code, axis=1)
+    levels = real_dtype().type((1 << n_bits) - 1)
+    pixels = codes[:, bit_reverse_indices(position_qubits(n_pixels))] / levels
+    return _to_images(pixels, shape, single)
+
+
+def _top_codes(outcomes, counts, n_pixels):
+    # Outcome = code * n_pixels + position: sort by position, count
+    # descending, code ascending and keep each position's first entry
+    positions, codes = outcomes % n_pixels, outcomes // n_pixels
+    order = np.lexsort((codes, -counts, positions))
+    seen, first = np.unique(positions[order], return_index=True)
+    top = np.zeros(n_pixels, dtype=np.int64)
+    top[seen] = codes[order[first]]
+    return top
+
+
+def decode_amplitude(hist, shape, norms=None):
+    """
+    Amplitude encoding: pixel ∝ sqrt(p_i). The image norm is lost in
+    encoding; pass norms (one per image) to restore the intensity scale,
+    otherwise the decoded images have unit norm.
+    """
+    batch, single = _split(hist, shape[0] * shape[1])
+    pixels = np.sqrt(batch / batch.sum(axis=1, keepdims=True))
+    if norms is not None:
+        pixels = pixels * np.reshape(norms, (-1, 1)).astype(pixels.dtype)
+    return _to_images(pixels, shape, single)
+
+
+def decode_mcqi(hist, shape, n_channels=3):
+    """
+    MCQI (mcqi.mcqi_circuit): FRQI's decoding on every (channel, position)
+    pair at once. Returns (H, W, n_channels) or (B, H, W, n_channels);
+    n_channels=4 keeps alpha.
+    """
+    n_pixels = shape[0] * shape[1]
+    batch, single = _split(hist, 8 * n_pixels)
+    # colour qubit, then 2 channel qubits, then position qubits
+    per_channel = batch.reshape(batch.shape[0], 2, 4, n_pixels)
+    theta = np.arctan2(np.sqrt(per_channel[:, 1]), np.sqrt(per_channel[:, 0]))
+    pixels = theta[:, :n_channels, bit_reverse_indices(position_qubits(n_pixels))]
+    images = np.moveaxis(pixels / batch.dtype.type(pi / 2), 1, -1)
+    images = images.reshape((-1,) + tuple(shape[:2]) + (n_channels,))
+    return images[0] if single else images
+
+# ===============================
+# FIDELITY METRICS
+# ===============================
+# Metrics keep their inputs in the policy's real dtype and accumulate
+# reductions in float64.
+def _batch_images(a, b):
+    a = np.asarray(a, dtype=real_dtype())
+    b = np.asarray(b, dtype=real_dtype())
+    if a.ndim == 2:
+        a = a[np.newaxis]
+    if b.ndim == 2:
+        b = b[np.newaxis]
+    return np.broadcast_arrays(a, b)
+
+
+def mse(originals, decoded):
+    a, b = _batch_images(originals, decoded)
+    return np.mean((a - b) ** 2, axis=(1, 2), dtype=np.float64)
+
+
+def psnr(originals, decoded, data_range=1.0):
+    err = mse(originals, decoded)
+    with np.errstate(divide="ignore"):
+        return 10 * np.log10(data_range ** 2 / err)
+
+
+def _gaussian_window(size, sigma=1.5):
+    x = np.arange(size) - (size - 1) / 2
+    w = np.exp(-(x ** 2) / (2 * sigma ** 2))
+    return w / w.sum()
+
+
+def _filter(images, window):
+    # Separable 'valid' filtering over the last two axes of a batch
+    k = window.size
+    rows = np.lib.stride_tricks.sliding_window_view(images, k, axis=1) @ window
+    return np.lib.stride_tricks.sliding_window_view(rows, k, axis=2) @ window
+
+
+def ssim(originals, decoded, data_range=1.0, window_size=11):
+    """
+    Mean SSIM (Wang et al. 2004, Gaussian window σ = 1.5) per image of a
+    batch. Images smaller than the window use the largest odd window
+    that fits.
+    """
+    a, b = _batch_images(originals, decoded)
+    size = min(window_size, a.shape[1], a.shape[2])
+    size -= 1 - size % 2
+    window = _gaussian_window(size).astype(a.dtype)
+
+    c1 = (0.01 * data_range) ** 2
+    c2 = (0.03 * data_range) ** 2
+    mu_a = _filter(a, window)
+    mu_b = _filter(b, window)
+    var_a = _filter(a * a, window) - mu_a ** 2
+    var_b = _filter(b * b, window) - mu_b ** 2
+    cov = _filter(a * b, window) - mu_a * mu_b
+
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / (
+        (mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2)
+    )
+    return ssim_map.mean(axis=(1, 2), dtype=np.float64)
+
+
+def fidelity_report(originals, decoded, data_range=1.0):
+    """
+    {"mse", "psnr", "ssim"} arrays with one entry per image.
+    """
+    return {
+        "mse": mse(originals, decoded),
+        "psnr": psnr(originals, decoded, data_range),
+        "ssim": ssim(originals, decoded, data_range),
+    }
+
+
+if __name__ == "__main__":
+    import time
+    from frqi_statevector import frqi_statevector
+
+    rng = np.random.default_rng(0)
+    images = rng.random((64, 64, 64))
+    probs = np.abs(frqi_statevector(images)) ** 2
+
+    print(f"{'shots':>10} {'psnr':>8} {'ssim':>8}")
+    for shots in (10_000, 100_000, 1_000_000, 10_000_000):
+        start = time.time()
+        counts = np.stack([rng.multinomial(shots, p / p.sum()) for p in probs])
+        decoded = decode_frqi(counts, (64, 64))
+        report = fidelity_report(images, decoded)
+        print(f"{shots:>10} {report['psnr'].mean():8.2f} {report['ssim'].mean():8.4f}  "
+              f"({time.time() - start:.2f} s for 64 images)")
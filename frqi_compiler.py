@@ -0,0 +1,161 @@
+import numpy as np
+from math import pi
+from qiskit import QuantumCircuit, transpile
+from qiskit.circuit import CircuitInstruction
+from qiskit.circuit.library import CXGate, RYGate, RZGate
+
+from frqi_statevector import bit_reverse_indices, position_qubits
+
+BASIS_GATES = ["cx", "u"]
+
+# ===============================
+# GRAY-CODE UNIFORMLY CONTROLLED ROTATIONS
+# ===============================
+def gray_codes(n_bits):
+    idx = np.arange(1 << n_bits)
+    return idx ^ (idx >> 1)
+
+
+def walsh_hadamard(values):
+    """
+    Unnormalized fast Walsh-Hadamard transform along the last axis.
+    """
+    out = np.array(values, dtype=np.float64)
+    n = out.shape[-1]
+    h = 1
+    while h < n:
+        out = out.reshape(out.shape[:-1] + (n // (2 * h), 2, h))
+        a = out[..., 0, :].copy()
+        b = out[..., 1, :]
+        out[..., 0, :] += b
+        out[..., 1, :] = a - b
+        out = out.reshape(out.shape[:-3] + (n,))
+        h *= 2
+    return out
+
+
+def ucr_angles(angles):
+    """
+    Gray-ordered rotation angles φ for a uniformly controlled rotation.
+
+    angles[x] is the rotation wanted when the controls hold the
+    little-endian value x. With φ_i = (W a)[g_i] / 2^k the alternating
+    sequence R(φ_0) CX R(φ_1) CX ... applies Σ_i (-1)^(x·g_i) φ_i = a_x.
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    n_controls = position_qubits(angles.shape[-1])
+    return walsh_hadamard(angles)[..., gray_codes(n_controls)] / angles.shape[-1]
+
+
+def cnot_controls(n_controls):
+    """
+    Control qubit (as an offset into the control list) of the CNOT that
+    follows each rotation: the bit flipping between consecutive Gray codes,
+    wrapping around so the last CNOT closes the cycle.
+    """
+    n = 1 << n_controls
+    steps = np.arange(1, n + 1) % n
+    lowest = np.where(steps == 0, n >> 1, steps & -steps)
+    return np.log2(lowest).astype(int)
+
+
+def ucr_ladder(qc, axis, phis, controls, target):
+    """
+    Append the alternating rotation/CNOT ladder for already Gray-ordered
+    angles. phis may be numbers or circuit Parameters.
+    """
+    # Appended as CircuitInstructions directly: qc.ry/qc.cx re-validate
+    # their arguments on every call, which dominates for 2^16-gate ladders
+    gate = {"y": RYGate, "z": RZGate}[axis]
+    qubits = qc.qubits
+    target = qubits[target]
+    controls = [qubits[c] for c in controls]
+    if not controls:
+        qc._append(CircuitInstruction(gate(phis[0]), (target,), ()))
+        return qc
+    cx = CXGate()
+    for phi, c in zip(phis, cnot_controls(len(controls))):
+        qc._append(CircuitInstruction(gate(phi), (target,), ()))
+        qc._append(CircuitInstruction(cx, (controls[c], target), ()))
+    return qc
+
+
+def uniformly_controlled_rotation(qc, axis, angles, controls, target):
+    """
+    Append a uniformly controlled RY/RZ to qc using 2^k rotations and 2^k
+    CNOTs for k controls, instead of 2^k independent multi-controlled
+    rotations.
+    """
+    phis = [float(phi) for phi in ucr_angles(angles)]
+    return ucr_ladder(qc, axis, phis, controls, target)
+
+# ===============================
+# FRQI BUILDER
+# ===============================
+def frqi_angles(image):
+    """
+    RY angle for each little-endian position value, matching
+    simulate.frqi_circuit (mcry(pi * v) on bit-reversed positions).
+    """
+    pixels = np.asarray(image, dtype=np.float64).flatten()
+    n_pos_qubits = position_qubits(pixels.size)
+    return pixels[bit_reverse_indices(n_pos_qubits)] * pi
+
+
+def frqi_ucr_circuit(image):
+    """
+    FRQI circuit with the same state as simulate.frqi_circuit, built from
+    n Hadamards, 2^n RY and 2^n CNOT gates.
+    """
+    angles = frqi_angles(image)
+    n_pos_qubits = position_qubits(angles.size)
+    qc = QuantumCircuit(n_pos_qubits + 1)
+
+    for i in range(n_pos_qubits):
+        qc.h(i)
+
+    uniformly_controlled_rotation(qc, "y", angles, range(n_pos_qubits), n_pos_qubits)
+    return qc
+
+# ===============================
+# RESOURCE REPORT
+# ===============================
+def circuit_resources(qc, basis_gates=BASIS_GATES):
+    compiled = transpile(qc, basis_gates=basis_gates, optimization_level=0)
+    return {
+        "qubits": qc.num_qubits,
+        "gates": qc.size(),
+        "depth": qc.depth(),
+        "basis_gates": compiled.size(),
+        "basis_depth": compiled.depth(),
+        "cx": compiled.count_ops().get("cx", 0),
+    }
+
+
+def frqi_resource_report(image, basis_gates=BASIS_GATES):
+    """
+    Resource counts of the Gray-code builder next to simulate.frqi_circuit.
+    """
+    from simulate import frqi_circuit
+
+    return {
+        "mcry": circuit_resources(frqi_circuit(image), basis_gates),
+        "ucr": circuit_resources(frqi_ucr_circuit(image), basis_gates),
+    }
+
+
+if __name__ == "__main__":
+    from qiskit.quantum_info import Statevector
+    from frqi_statevector import frqi_statevector
+
+    rng = np.random.default_rng(0)
+    print(f"{'size':>6} {'builder':>7} {'gates':>7} {'depth':>7} "
+          f"{'basis':>7} {'b.depth':>7} {'cx':>6}")
+    for size in (2, 4, 8, 16):
+        img = rng.random((size, size))
+        err = np.max(np.abs(Statevector(frqi_ucr_circuit(img)).data - frqi_statevector(img)))
+        report = frqi_resource_report(img)
+        for name, r in report.items():
+            print(f"{size:>3}x{size:<2} {name:>7} {r['gates']:>7} {r['depth']:>7} "
+                  f"{r['basis_gates']:>7} {r['basis_depth']:>7} {r['cx']:>6}")
+        print(f"       max |ucr - closed form| = {err:.2e}")
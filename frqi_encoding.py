@@ -1,6 +1,7 @@
 import numpy as np
 from qiskit import QuantumCircuit
-from math import pi
+
+from frqi_compiler import frqi_angles, uniformly_controlled_rotation
 
 def frqi_circuit(image):
     n = int(np.log2(image.size))  # number of position qubits
@@ -10,10 +11,8 @@ def frqi_circuit(image):
     for i in range(n):
         qc.h(i)
 
-    # Encode pixel values using rotations
-    flat_image = image.flatten()
-    for idx, pixel in enumerate(flat_image):
-        angle = pixel * pi
-        qc.cry(2 * angle, idx % n, n)
+    # Encode pixel values with one uniformly controlled rotation
+    # (Gray-code ordered RY/CNOT ladder over all position qubits)
+    uniformly_controlled_rotation(qc, "y", frqi_angles(image), range(n), n)
 
     return qc
@@ -1,7 +1,9 @@
 import os
-import cv2
 import numpy as np
-import matplotlib.pyplot as plt
+
+from image_transforms import ImageTransform
+from precision import to_unit
+from tracing import span
 
 # ===============================
 # Quantum-inspired model functions
@@ -36,12 +38,13 @@ def amplitude(img):
 def quantum_geometric_transform(image, transform="rotate"):
     """
     Simulated quantum geometric transformation
-    Rotation corresponds to SWAP operations on position qubits
+    Rotation corresponds to SWAP + X operations on position qubits;
+    the permutation is the one ImageTransform.circuit() emits
     """
     if transform == "rotate":
-        return np.rot90(image)      # 90° rotation
+        return ImageTransform(image.shape[0]).rot90().apply(image)      # 90° rotation
     elif transform == "flip":
-        return np.fliplr(image)     # horizontal flip
+        return ImageTransform(image.shape[0]).flip_h().apply(image)     # horizontal flip
     return image
 
 
@@ -59,40 +62,56 @@ DATASETS = ["brain_tumor", "mnist", "sar", "ssdd"]
 # Main generation loop
 # ===============================
 
-for dataset in DATASETS:
-    print(f"\n🔹 Processing dataset: {dataset}")
+def main():
+    # cv2 and matplotlib are only needed here, so importing MODELS stays cheap
+    import cv2
+    import matplotlib.pyplot as plt
+
+    for dataset in DATASETS:
+        print(f"\n🔹 Processing dataset: {dataset}")
+
+        img_path = f"data/{dataset}.png"
+        save_dir = f"outputs/{dataset}"
+        os.makedirs(save_dir, exist_ok=True)
+
+        # Load image
+        with span("imread", items=1, dataset=dataset):
+            img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise FileNotFoundError(f"❌ Image not found: {img_path}")
 
-    img_path = f"data/{dataset}.png"
-    save_dir = f"outputs/{dataset}"
-    os.makedirs(save_dir, exist_ok=True)
+        # Resize + normalize
+        with span("resize", items=1, dataset=dataset):
+            img = cv2.resize(img, (64, 64))
+            img = to_unit(img)
 
-    # Load image
-    img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
-    if img is None:
-        raise FileNotFoundError(f"❌ Image not found: {img_path}")
+        # Save original
+        with span("imsave", items=1, dataset=dataset):
+            plt.imsave(f"{save_dir}/original.png", img, cmap="gray")
 
-    # Resize + normalize
-    img = cv2.resize(img, (64, 64))
-    img = img / 255.0
+        # Apply each model
+        for model_name, model_func in MODELS.items():
+            with span("model", items=1, model=model_name):
+                output = model_func(img)
 
-    # Save original
-    plt.imsave(f"{save_dir}/original.png", img, cmap="gray")
+            # Save model output
+            with span("imsave", items=1, dataset=dataset):
+                plt.imsave(f"{save_dir}/{model_name}.png", output, cmap="gray")
 
-    # Apply each model
-    for model_name, model_func in MODELS.items():
-        output = model_func(img)
+            # Apply geometric transformation (rotation)
+            with span("transform", items=1, model=model_name):
+                rotated = quantum_geometric_transform(output, "rotate")
+            with span("imsave", items=1, dataset=dataset):
+                plt.imsave(
+                    f"{save_dir}/{model_name}_rotated.png",
+                    rotated,
+                    cmap="gray"
+                )
 
-        # Save model output
-        plt.imsave(f"{save_dir}/{model_name}.png", output, cmap="gray")
+        print(f"✅ Outputs saved in: {save_dir}")
 
-        # Apply geometric transformation (rotation)
-        rotated = quantum_geometric_transform(output, "rotate")
-        plt.imsave(
-            f"{save_dir}/{model_name}_rotated.png",
-            rotated,
-            cmap="gray"
-        )
+    print("\n🎉 ALL DATASET OUTPUTS GENERATED SUCCESSFULLY")
 
-    print(f"✅ Outputs saved in: {save_dir}")
 
-print("\n🎉 ALL DATASET OUTPUTS GENERATED SUCCESSFULLY")
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,68 @@
 import cv2
-import numpy as np
+
+import ha_qir
+from precision import to_unit
+
+N = 8
+THRESHOLD = 0.6
 
 # -----------------------------
 # 1. Load Image
 # -----------------------------
-img = cv2.imread("data/sample.jpg", cv2.IMREAD_GRAYSCALE)
+def load_image(path="data/sample.jpg", size=N):
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
 
-if img is None:
-    raise FileNotFoundError("Image not found. Check path: data/sample.jpg")
+    if img is None:
+        raise FileNotFoundError(f"Image not found. Check path: {path}")
 
-# Resize to NxN (small for demo)
-N = 8
-img = cv2.resize(img, (N, N))
+    # Resize to NxN (small for demo)
+    img = cv2.resize(img, (size, size))
 
-# Normalize
-img = img / 255.0
+    # Normalize
+    return to_unit(img)
 
 # -----------------------------
-# 2. ROI Extraction
+# 2. HA-QIR Encoding
 # -----------------------------
-threshold = 0.6
-roi_mask = img > threshold
-
-roi_pixels = img[roi_mask]
-bg_pixels = img[~roi_mask]
+# ROI pixels (MCQI approx) and background pixels (amplitude) are each
+# normalized on their own; see ha_qir.encode for batches, adaptive
+# thresholds and tiling.
+def ha_qir_encode(img, threshold=THRESHOLD):
+    return ha_qir.encode(img, "fixed", value=threshold)
 
 # -----------------------------
-# 3. MCQI Encoding (ROI)
+# 3. Output Summary
 # -----------------------------
-def mcqi_encode(pixels):
-    if len(pixels) == 0:
-        return np.array([])
-    return pixels / np.linalg.norm(pixels)
+def main():
+    import matplotlib.pyplot as plt
 
-roi_state = mcqi_encode(roi_pixels)
+    img = load_image()
+    enc = ha_qir_encode(img)
 
-# -----------------------------
-# 4. Amplitude Encoding (Background)
-# -----------------------------
-def amplitude_encode(pixels):
-    if len(pixels) == 0:
-        return np.array([])
-    return pixels / np.linalg.norm(pixels)
+    print("HA-QIR Encoding Successful")
+    print(f"ROI qubits (MCQI approx): {len(enc.roi_state(0))}")
+    print(f"Background qubits (Amplitude): {len(enc.bg_state(0))}")
+    print(f"Total Hybrid State Length: {len(enc.states[0])}")
 
-bg_state = amplitude_encode(bg_pixels)
+    reconstructed = enc.reconstruct()[0]
 
-# -----------------------------
-# 5. HA-QIR Hybrid State
-# -----------------------------
-hybrid_state = np.concatenate([roi_state, bg_state])
+    plt.figure(figsize=(6,3))
+
+    plt.subplot(1,2,1)
+    plt.title("Original Image")
+    plt.imshow(img, cmap='gray')
+    plt.axis('off')
+
+    plt.subplot(1,2,2)
+    plt.title("HA-QIR Processed")
+    plt.imshow(reconstructed, cmap='gray')
+    plt.axis('off')
+
+    plt.tight_layout()
+    plt.savefig("outputs/ha_qir_output.png")
+    plt.savefig("results/ha_qir_output.png", dpi=300, bbox_inches="tight")
+    plt.show()
 
-# -----------------------------
-# 6. Output Summary
-# -----------------------------
-print("HA-QIR Encoding Successful")
-print(f"ROI qubits (MCQI approx): {len(roi_state)}")
-print(f"Background qubits (Amplitude): {len(bg_state)}")
-print(f"Total Hybrid State Length: {len(hybrid_state)}")
-import matplotlib.pyplot as plt
-
-# Reconstruct visualization (classical)
-reconstructed = np.zeros_like(img)
-reconstructed[roi_mask] = roi_pixels
-reconstructed[~roi_mask] = bg_pixels
-
-plt.figure(figsize=(6,3))
-
-plt.subplot(1,2,1)
-plt.title("Original Image")
-plt.imshow(img, cmap='gray')
-plt.axis('off')
-
-plt.subplot(1,2,2)
-plt.title("HA-QIR Processed")
-plt.imshow(reconstructed, cmap='gray')
-plt.axis('off')
-
-plt.tight_layout()
-plt.savefig("outputs/ha_qir_output.png")
-plt.savefig("results/ha_qir_output.png", dpi=300, bbox_inches="tight")
-plt.show()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy as np
+
+from precision import real_dtype
+from preprocessing import preprocess_image
+from tracing import span
+
+CACHE_DIR = os.path.join("cache", "images")
+MAX_CACHE_BYTES = 1 << 30
+
+# ===============================
+# PREPROCESSED IMAGE CACHE
+# ===============================
+class ImageCache:
+    """
+    Persistent cache of preprocessed images.
+
+    Entries are keyed by (path, mtime, size, rgb, dtype) and stored as one
+    .npy file each, opened with mmap_mode="r" so repeat runs and parallel
+    workers share the decoded pixels through the page cache instead of
+    copying them. A small .json sidecar next to each .npy records its
+    key, so writers never share a file; a .npy's mtime doubles as its
+    last-use time for LRU eviction once the store grows past max_bytes.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Store size as seen by this instance: scanned once, then kept up
+        # to date by put() and evict(). Other processes' puts show up at
+        # the next eviction scan.
+        self._total = None
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- keys and entries ----------
+
+    @staticmethod
+    def make_key(path, size, rgb=False, dtype=None):
+        # None means the precision policy's dtype, as in preprocess_image
+        path = os.path.abspath(path)
+        return {
+            "path": path,
+            "mtime": os.stat(path).st_mtime_ns,
+            "size": size,
+            "rgb": bool(rgb),
+            "dtype": real_dtype(dtype).name,
+        }
+
+    def _file(self, key):
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.root, digest + ".npy")
+
+    @staticmethod
+    def _sidecar(file):
+        return os.path.splitext(file)[0] + ".json"
+
+    def _arrays(self):
+        # (mtime, nbytes, name) of every cached array
+        arrays = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".npy"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:  # evicted by another process
+                    continue
+                arrays.append((st.st_mtime, st.st_size, entry.name))
+        return arrays
+
+    def _remove(self, name):
+        file = os.path.join(self.root, name)
+        os.remove(file)
+        try:
+            os.remove(self._sidecar(file))
+        except FileNotFoundError:
+            pass
+
+    # ---------- lookup ----------
+
+    def get(self, path, size, rgb=False, dtype=None):
+        """
+        Memory-mapped cached image, or None on a miss. A changed source
+        file has a new mtime and therefore a new key.
+        """
+        file = self._file(self.make_key(path, size, rgb, dtype))
+        try:
+            img = np.load(file, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(file)
+        except FileNotFoundError:
+            pass  # evicted since it was mapped; the mapping stays valid
+        self.hits += 1
+        return img
+
+    def put(self, path, size, rgb, dtype, img):
+        dtype = real_dtype(dtype)
+        key = self.make_key(path, size, rgb, dtype)
+        file = self._file(key)
+        if self._total is None:
+            self._total = self.total_bytes()
+        # Write to temp files and rename so readers never see a partial one
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(img, dtype=dtype))
+        try:
+            # Overwriting an entry replaces its bytes rather than adding to them
+            self._total -= os.path.getsize(file)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, file)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(key, f)
+        os.replace(tmp, self._sidecar(file))
+        self._total += os.path.getsize(file)
+
+        # Map before evicting: an open mapping survives its file being removed
+        img = np.load(file, mmap_mode="r")
+        if self.max_bytes is not None and self._total > self.max_bytes:
+            self.evict(self.max_bytes)
+        return img
+
+    def load(self, path, size, rgb=False, dtype=None):
+        """
+        Cached preprocess_image(path, size, rgb, dtype).
+        """
+        dtype = real_dtype(dtype)
+        with span("image_cache.get", items=1):
+            img = self.get(path, size, rgb, dtype)
+        if img is None:
+            img = self.put(path, size, rgb, dtype, preprocess_image(path, size, rgb, dtype))
+        return img
+
+    # ---------- maintenance ----------
+
+    def total_bytes(self):
+        return sum(nbytes for _, nbytes, _ in self._arrays())
+
+    def evict(self, max_bytes):
+        """
+        Delete least recently used entries until the store fits max_bytes.
+        """
+        arrays = self._arrays()
+        total = sum(nbytes for _, nbytes, _ in arrays)
+        for _, nbytes, name in sorted(arrays):
+            if total <= max_bytes:
+                break
+            try:
+                self._remove(name)
+            except FileNotFoundError:  # evicted by another process
+                pass
+            except OSError:  # still mapped on Windows
+                continue
+            total -= nbytes
+        self._total = total
+
+    def invalidate(self, path=None):
+        """
+        Drop stale entries whose source file is gone or has changed, or
+        every entry for path if one is given. Returns the number removed.
+        """
+        target = os.path.abspath(path) if path is not None else None
+        removed = 0
+        for _, _, name in self._arrays():
+            try:
+                with open(self._sidecar(os.path.join(self.root, name))) as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            if target is not None:
+                stale = entry["path"] == target
+            else:
+                try:
+                    stale = os.stat(entry["path"]).st_mtime_ns != entry["mtime"]
+                except FileNotFoundError:
+                    stale = True
+            if stale:
+                try:
+                    self._remove(name)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        self._total = None
+        return removed
+
+    def clear(self):
+        for _, _, name in self._arrays():
+            try:
+                self._remove(name)
+            except FileNotFoundError:
+                pass
+        self._total = 0
@@ -0,0 +1,221 @@
+import time
+import numpy as np
+
+from frqi_statevector import bit_reverse_indices, position_qubits
+
+# ===============================
+# TRANSFORM ENGINE
+# ===============================
+class ImageTransform:
+    """
+    A chain of geometric operations on size x size images, folded into one
+    pixel permutation: transformed.flat[p] = image.flat[src[p]].
+
+    Every operation is a map v -> A v + t on (row, col) modulo size, with
+    A a signed coordinate permutation, so any chain reduces to at most a
+    transpose, a complement per axis and a cyclic shift per axis. That
+    canonical form is what circuit() emits.
+    """
+
+    def __init__(self, size, src=None):
+        self.size = size
+        self.src = np.arange(size * size) if src is None else src
+
+    def _then(self, rows, cols):
+        # rows/cols: source coordinates of every destination pixel
+        step = (rows % self.size) * self.size + cols % self.size
+        return ImageTransform(self.size, self.src[step.ravel()])
+
+    def _grid(self):
+        return np.mgrid[0:self.size, 0:self.size]
+
+    # ---------- operations (each returns a new transform) ----------
+
+    def flip_h(self):
+        r, c = self._grid()
+        return self._then(r, self.size - 1 - c)
+
+    def flip_v(self):
+        r, c = self._grid()
+        return self._then(self.size - 1 - r, c)
+
+    def transpose(self):
+        r, c = self._grid()
+        return self._then(c, r)
+
+    def anti_transpose(self):
+        r, c = self._grid()
+        return self._then(self.size - 1 - c, self.size - 1 - r)
+
+    def rot90(self, k=1):
+        """
+        Counterclockwise by 90° k times, like np.rot90.
+        """
+        out = self
+        for _ in range(k % 4):
+            out = out.transpose().flip_v()
+        return out
+
+    def shift(self, rows=0, cols=0):
+        """
+        Cyclic shift, like np.roll(image, (rows, cols), axis=(0, 1)).
+        """
+        r, c = self._grid()
+        return self._then(r - rows, c - cols)
+
+    def then(self, other):
+        return ImageTransform(self.size, self.src[other.src])
+
+    # ---------- classical application ----------
+
+    def apply(self, images):
+        """
+        Transform a (H, W) image or (B, H, W) batch with one gather.
+        """
+        images = np.asarray(images)
+        flat = images.reshape(images.shape[:-2] + (-1,))
+        return flat[..., self.src].reshape(images.shape)
+
+    def state_permutation(self, layout="position"):
+        """
+        The permutation on statevector position indices. "position" is
+        the FRQI/NEQR layout (position qubit q holds bit n-1-q of the
+        pixel index), "amplitude" the initialize/amplitude_prep layout
+        (basis index = pixel index).
+        """
+        if layout == "amplitude":
+            return self.src
+        rev = bit_reverse_indices(position_qubits(self.src.size))
+        return rev[self.src[rev]]
+
+    def apply_state(self, states, layout="position"):
+        """
+        Permute statevectors (..., 2^q) whose lowest qubits are the
+        position register; higher qubits (colour, intensity) are kept.
+        """
+        states = np.asarray(states)
+        n_pixels = self.src.size
+        blocks = states.reshape(states.shape[:-1] + (-1, n_pixels))
+        return blocks[..., self.state_permutation(layout)].reshape(states.shape)
+
+    def apply_sparse(self, state):
+        """
+        Transformed copy of a neqr_sparse.SparseNEQRState.
+        """
+        return type(state)(self.apply(state.codes), state.n_bits)
+
+    # ---------- gate sequence ----------
+
+    def canonical(self):
+        """
+        (swap, flip_rows, flip_cols, shift_rows, shift_cols) such that the
+        transform moves pixel v to: transpose v if swap, complement the
+        flagged axes, then add the shifts modulo size.
+        """
+        w = self.size
+        dest = np.empty_like(self.src)
+        dest[self.src] = np.arange(self.src.size)
+
+        def coords(p):
+            return np.array(divmod(int(dest[p]), w))
+
+        origin = coords(0)
+        if w == 1:
+            return False, False, False, 0, 0
+        down, right = (coords(w) - origin) % w, (coords(1) - origin) % w
+        swap = bool(down[0] == 0)
+        row_step, col_step = (right, down) if swap else (down, right)
+        flip_rows = bool(row_step[0] == w - 1 and w > 2)
+        flip_cols = bool(col_step[1] == w - 1 and w > 2)
+        shift = (origin - np.array([flip_rows, flip_cols]) * (w - 1)) % w
+        form = (swap, flip_rows, flip_cols, int(shift[0]), int(shift[1]))
+
+        if not np.array_equal(_canonical_src(w, *form), self.src):
+            raise ValueError("Transform is not an affine map of the pixel grid")
+        return form
+
+    def circuit(self, num_qubits=None, layout="position"):
+        """
+        Gates on the position qubits that perform this transform: at most
+        m SWAPs, 2m X gates and two cyclic adders for a 2^m x 2^m image,
+        however long the chain was. num_qubits defaults to the position
+        register alone.
+        """
+        from qiskit import QuantumCircuit
+
+        n = position_qubits(self.src.size)
+        m = n // 2
+        qc = QuantumCircuit(num_qubits or n)
+        if layout == "amplitude":
+            row_qubits = [m + b for b in range(m)]
+            col_qubits = [b for b in range(m)]
+        else:
+            row_qubits = [m - 1 - b for b in range(m)]
+            col_qubits = [n - 1 - b for b in range(m)]
+
+        swap, flip_rows, flip_cols, shift_rows, shift_cols = self.canonical()
+        if swap:
+            for r, c in zip(row_qubits, col_qubits):
+                qc.swap(r, c)
+        if flip_rows:
+            qc.x(row_qubits)
+        if flip_cols:
+            qc.x(col_qubits)
+        _add_constant(qc, row_qubits, shift_rows)
+        _add_constant(qc, col_qubits, shift_cols)
+        return qc
+
+
+def _canonical_src(w, swap, flip_rows, flip_cols, shift_rows, shift_cols):
+    out = ImageTransform(w)
+    if swap:
+        out = out.transpose()
+    if flip_rows:
+        out = out.flip_v()
+    if flip_cols:
+        out = out.flip_h()
+    return out.shift(shift_rows, shift_cols).src
+
+
+def _add_constant(qc, qubits, value):
+    # qubits[b] holds bit b of the register. Adding 2^t increments bits
+    # t and up: flip bit j when all bits t..j-1 are set, highest j first.
+    for t in range(len(qubits)):
+        if not (value >> t) & 1:
+            continue
+        for j in range(len(qubits) - 1, t, -1):
+            qc.mcx(qubits[t:j], qubits[j])
+        qc.x(qubits[t])
+    return qc
+
+
+if __name__ == "__main__":
+    from qiskit.quantum_info import Statevector
+    from frqi_compiler import frqi_ucr_circuit
+    from frqi_statevector import frqi_statevector
+    from neqr_sparse import SparseNEQRState
+
+    rng = np.random.default_rng(0)
+    image = rng.random((8, 8))
+    chain = ImageTransform(8).rot90().flip_h().shift(3, -2).transpose().rot90(3)
+    expected = np.rot90(np.roll(np.fliplr(np.rot90(image)), (3, -2), axis=(0, 1)).T, 3)
+    print("classical chain matches numpy:", np.allclose(chain.apply(image), expected))
+
+    qc = frqi_ucr_circuit(image)
+    qc.compose(chain.circuit(qc.num_qubits), inplace=True)
+    circuit_state = Statevector(qc).data
+    print("circuit == permuted statevector:",
+          np.allclose(circuit_state, chain.apply_state(frqi_statevector(image))),
+          "| == FRQI of transformed image:",
+          np.allclose(circuit_state, frqi_statevector(expected)))
+    print("canonical form:", chain.canonical(), "gates:", dict(chain.circuit().count_ops()))
+
+    sparse = SparseNEQRState.from_images(rng.random((4, 8, 8)), 4)
+    print("sparse NEQR:", np.array_equal(chain.apply_sparse(sparse).codes,
+                                         chain.apply(sparse.codes)))
+
+    batch = rng.random((64, 256, 256))
+    big = ImageTransform(256).rot90().flip_v().shift(17, 5)
+    start = time.time()
+    big.apply(batch)
+    print(f"64 x 256x256 transformed in {time.time() - start:.3f} s")
@@ -1,19 +1,116 @@
-from qiskit import QuantumCircuit
+import time
 import numpy as np
-import matplotlib.pyplot as plt
+from math import pi
+from qiskit import QuantumCircuit
+
+from frqi_compiler import uniformly_controlled_rotation
+from frqi_statevector import bit_reverse_indices, position_qubits
+from precision import complex_dtype, real_of
+
+CHANNELS = ("R", "G", "B", "alpha")
+CHANNEL_QUBITS = 2
+
+# ===============================
+# QUBIT LAYOUT
+# ===============================
+# MCQI: 1/2^((n+2)/2) Σ_i Σ_c (cos θ_ci |0> + sin θ_ci |1>) ⊗ |c> ⊗ |i>
+# Position qubits 0..n-1 as in FRQI (qubit 0 holds the MSB of the pixel
+# index), channel qubits n and n+1 (channel c = R, G, B, alpha as a
+# little-endian 2-bit value) and the colour qubit n+2. θ_ci = pi/2 * v_ci
+# like FRQI; the alpha channel is 0 unless the image has a fourth channel.
+def mcqi_channels(images):
+    """
+    (H, W, 3|4) or (B, H, W, 3|4) -> (B, 4, H * W) channel-major pixels,
+    with alpha = 0 for RGB input.
+    """
+    images = np.asarray(images)
+    single = images.ndim == 3
+    if single:
+        images = images[np.newaxis]
+    if images.ndim != 4 or images.shape[-1] not in (3, 4):
+        raise ValueError(f"Expected (H, W, 3|4) or (B, H, W, 3|4) images, got {images.shape}")
+    n_images, h, w, n_channels = images.shape
+    channels = np.zeros((n_images, len(CHANNELS), h * w), dtype=images.dtype)
+    channels[:, :n_channels] = np.moveaxis(images, -1, 1).reshape(n_images, n_channels, h * w)
+    return channels, single
+
+
+def mcqi_angles(image):
+    """
+    RY angle of the colour qubit for each little-endian value of the
+    (position, channel) controls: index rev(i) + N * c.
+    """
+    channels, _ = mcqi_channels(image)
+    n_pixels = channels.shape[2]
+    rev = bit_reverse_indices(position_qubits(n_pixels))
+    return channels[0][:, rev].astype(np.float64).ravel() * pi
+
+# ===============================
+# STATEVECTOR
+# ===============================
+def mcqi_statevector(images, dtype=None):
+    """
+    Closed-form MCQI state of mcqi_circuit for a batch: (8N,) for one
+    (H, W, 3) image or (B, 8N) for (B, H, W, 3), in dtype or the
+    precision policy's complex dtype. All channels are written at once.
+    """
+    dtype = complex_dtype(dtype)
+    real = real_of(dtype)
+    channels, single = mcqi_channels(images)
+    n_images, n_channels, n_pixels = channels.shape
+    rev = bit_reverse_indices(position_qubits(n_pixels))
+
+    theta = channels[:, :, rev].astype(real, copy=False) * real.type(pi / 2)
+    scale = real.type(1.0 / np.sqrt(n_channels * n_pixels))
+    state = np.empty((n_images, 2, n_channels, n_pixels), dtype=dtype)
+    state[:, 0] = np.cos(theta) * scale
+    state[:, 1] = np.sin(theta) * scale
+    state = state.reshape(n_images, -1)
+    return state[0] if single else state
+
+# ===============================
+# CIRCUIT
+# ===============================
+def mcqi_circuit(image):
+    """
+    MCQI circuit for one (H, W, 3|4) image: Hadamards on the position and
+    channel qubits, then one uniformly controlled RY on the colour qubit
+    over both registers. Its Gray-code ladder runs one channel's 2^n
+    rotations after another, 4 * 2^n RY and CNOT gates in total.
+    """
+    angles = mcqi_angles(image)
+    n_controls = position_qubits(angles.size)
+    qc = QuantumCircuit(n_controls + 1)
+    for i in range(n_controls):
+        qc.h(i)
+    uniformly_controlled_rotation(qc, "y", angles, range(n_controls), n_controls)
+    return qc
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from qiskit.quantum_info import Statevector
+    import decoding
 
-# One RGB pixel values
-R, G, B = 0.6, 0.3, 0.8
+    # One RGB pixel values
+    R, G, B = 0.6, 0.3, 0.8
+    pixel = np.array([[[R, G, B]]])
 
-# 3 qubits for R, G, B channels
-qc = QuantumCircuit(3)
+    rng = np.random.default_rng(0)
+    for size in (1, 2, 4):
+        img = rng.random((size, size, 3))
+        err = np.max(np.abs(Statevector(mcqi_circuit(img)).data - mcqi_statevector(img)))
+        print(f"{size}x{size} RGB: max |closed form - circuit| = {err:.2e}")
 
-# Encode RGB channels using rotations
-qc.ry(2 * np.arcsin(R), 0)  # Red
-qc.ry(2 * np.arcsin(G), 1)  # Green
-qc.ry(2 * np.arcsin(B), 2)  # Blue
+    batch = rng.random((8, 256, 256, 3))
+    start = time.time()
+    states = mcqi_statevector(batch, dtype=np.complex64)
+    decoded = decoding.decode_mcqi(np.abs(states) ** 2, (256, 256))
+    print(f"8 x 256x256 RGB: states {states.shape} and decode in {time.time() - start:.3f} s, "
+          f"max error {np.max(np.abs(decoded - batch)):.1e}")
 
-# Draw, save, and show circuit
-qc.draw(output='mpl')
-plt.savefig("mcqi_circuit.png")
-plt.show()
+    # Draw, save, and show circuit
+    qc = mcqi_circuit(pixel)
+    qc.draw(output='mpl')
+    plt.savefig("mcqi_circuit.png")
+    plt.show()
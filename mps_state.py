@@ -0,0 +1,424 @@
+import time
+import numpy as np
+from math import pi
+
+from frqi_statevector import frqi_statevector, position_qubits
+from neqr_sparse import code_dtype, quantize
+from precision import complex_dtype, real_dtype
+
+RAM_BUDGET = 2 * 1024 ** 3  # bytes
+MPS_MAX_BOND = 1024
+MPS_MAX_ERROR = 1e-10  # discarded weight allowed per bond
+SWEEP_CHUNK = 1 << 20  # buffer elements per float64 block of the sweep
+
+# ===============================
+# SWEEP
+# ===============================
+# The MPS is built straight from the pixels, never from the 2^q state
+# tensor. Sites right of the position register (FRQI's colour qubit,
+# NEQR's intensity qubits) are attached exactly, which leaves a position
+# matrix m with one row per pixel and one column per bond value. The
+# position sites are then split off right to left from that (N, χ)
+# buffer, overwritten in place: each cut diagonalizes the small float64
+# Gram matrix A^T A of the (rows, 2χ) view A, keeps its leading
+# eigenvectors V as the next site and writes A V back into the buffer.
+def _keep(s, max_bond, max_error):
+    # Fewest singular values whose discarded weight stays within max_error
+    weight = s ** 2
+    tail = np.cumsum(weight[::-1])[::-1]  # tail[k] = weight discarded keeping k
+    keep = int(np.count_nonzero(tail > max_error * tail[0])) if tail[0] > 0 else 1
+    return max(1, min(keep, max_bond or keep))
+
+
+def _split(gram, chi, max_bond, max_error):
+    # Leading eigenvectors of the Gram matrix: (V, site tensor, weight kept)
+    w, v = np.linalg.eigh(gram)
+    w, v = np.clip(w[::-1], 0, None), v[:, ::-1]
+    keep = _keep(np.sqrt(w), max_bond, max_error)
+    v = v[:, :keep]
+    return v, v.T.reshape(keep, 2, chi), float(w[:keep].sum())
+
+
+def _sweep(buf, chi, n_left, tensors, max_bond, max_error, total=None):
+    """
+    Fill tensors[0:n_left] from buf, which holds the (2^n_left, χ)
+    position matrix of sites 0..n_left-1 in C order. Returns the
+    fidelity, the weight kept out of total (the weight before any
+    truncation, taken from the first Gram matrix if not given).
+    """
+    real = buf.dtype
+    for k in range(n_left - 1, 0, -1):
+        rows, width = 1 << k, 2 * chi
+        a = buf[:rows * width].reshape(rows, width)
+        step = max(1, SWEEP_CHUNK // width)
+        gram = np.zeros((width, width))
+        for start in range(0, rows, step):
+            block = a[start:start + step].astype(np.float64)
+            gram += block.T @ block
+            del block  # before the next block is allocated
+        if total is None:
+            total = float(np.trace(gram))
+        v, site, _ = _split(gram, chi, max_bond, max_error)
+        keep = v.shape[1]
+        tensors[k] = site.astype(real)
+        # Rows [start, stop) are read before their output, which ends at
+        # stop * keep <= stop * width, is written
+        for start in range(0, rows, step):
+            out = a[start:start + step].astype(np.float64) @ v
+            buf[start * keep:(start + len(out)) * keep] = out.ravel()
+            del out
+        chi = keep
+
+    m = buf[:2 * chi].reshape(2, chi).astype(np.float64)
+    kept = float(np.sum(m ** 2))
+    total = kept if total is None else total
+    tensors[0] = (m / np.sqrt(kept)).astype(real).reshape(1, 2, chi)
+    return kept / total if total > 0 else 1.0
+
+
+def _pixel_qubits(image):
+    n = position_qubits(np.asarray(image).size)
+    if n == 0:
+        raise ValueError("An MPS needs at least 2 pixels")
+    return n
+
+# ===============================
+# MPS
+# ===============================
+class MPSState:
+    """
+    Matrix product state of an encoded image, one real (χ_l, 2, χ_r)
+    tensor per qubit in Qiskit order, in the precision policy's dtype.
+
+    from_frqi/from_neqr/from_amplitude build it from the pixels (see
+    SWEEP above), keeping at most max_bond values per position bond and
+    dropping those whose weight sums to at most max_error. Every site but
+    the first is right canonical. Each truncation projects the state, so
+    the fidelity with the exact state is the weight that survives all of
+    them, recorded in self.fidelity before the result is renormalized.
+    """
+
+    def __init__(self, tensors, fidelity=1.0):
+        self.tensors = tensors
+        self.fidelity = fidelity
+
+    @classmethod
+    def from_frqi(cls, image, max_bond=MPS_MAX_BOND, max_error=MPS_MAX_ERROR):
+        n = _pixel_qubits(image)
+        real = real_dtype()
+        # Colour qubit n is its own bond: m[i] = (cos θ_i, sin θ_i) / sqrt(N)
+        buf = np.empty((1 << n, 2), dtype=real)
+        np.multiply(np.asarray(image).ravel(), pi / 2, out=buf[:, 0])
+        buf[:, 1] = buf[:, 0]
+        np.cos(buf[:, 0], out=buf[:, 0])
+        np.sin(buf[:, 1], out=buf[:, 1])
+        buf *= real.type(1 / np.sqrt(1 << n))
+
+        tensors = [None] * (n + 1)
+        tensors[n] = np.eye(2, dtype=real).reshape(2, 2, 1)
+        return cls(tensors, _sweep(buf.reshape(-1), 2, n, tensors, max_bond, max_error))
+
+    @classmethod
+    def from_neqr(cls, image, n_bits=8, max_bond=MPS_MAX_BOND, max_error=MPS_MAX_ERROR):
+        n = _pixel_qubits(image)
+        n_pixels = 1 << n
+        real = real_dtype()
+        values, idx = np.unique(quantize(np.asarray(image).ravel(), n_bits),
+                                return_inverse=True)
+        values = values.astype(np.int64)
+        n_codes = values.size
+
+        # Intensity qubit n + j holds bit j of the code. Left of it the
+        # bond runs over the distinct values of code >> j, so each site
+        # maps value a to (bit a & 1, bond a >> 1): exact and right
+        # canonical, at most 2^(n_bits - j) wide
+        tensors = [None] * (n + n_bits)
+        right = np.zeros(1, dtype=np.int64)
+        for j in range(n_bits - 1, -1, -1):
+            left = np.unique(values >> j)
+            site = np.zeros((left.size, 2, right.size), dtype=real)
+            site[np.arange(left.size), left & 1, np.searchsorted(right, left >> 1)] = 1
+            tensors[n + j] = site
+            right = left
+
+        # The position matrix is one-hot (pixel i -> its code), so the
+        # first cut's Gram matrix is a pair count and A V a gather
+        c0 = idx[0::2]
+        c1 = idx[1::2] + n_codes
+        width = 2 * n_codes
+        pairs = np.bincount(c0 * width + c1, minlength=width * width).reshape(width, width)
+        gram = (pairs + pairs.T + np.diag(np.bincount(np.concatenate([c0, c1]),
+                                                      minlength=width))) / n_pixels
+        v, site, _ = _split(gram, n_codes, max_bond, max_error)
+        tensors[n - 1] = site.astype(real)
+
+        keep = v.shape[1]
+        v = v / np.sqrt(n_pixels)
+        buf = np.empty((n_pixels // 2, keep), dtype=real)
+        step = max(1, SWEEP_CHUNK // keep)
+        for start in range(0, n_pixels // 2, step):
+            stop = start + step
+            buf[start:stop] = v[c0[start:stop]] + v[c1[start:stop]]
+        fidelity = _sweep(buf.reshape(-1), keep, n - 1, tensors, max_bond, max_error,
+                          total=1.0)
+        return cls(tensors, fidelity)
+
+    @classmethod
+    def from_amplitude(cls, image, max_bond=MPS_MAX_BOND, max_error=MPS_MAX_ERROR):
+        n = _pixel_qubits(image)
+        vec = np.asarray(image, dtype=real_dtype()).ravel()
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            raise ValueError("Cannot amplitude-encode an all-zero image")
+        # Basis index = pixel index, so qubit k is bit k: reversing the
+        # axes puts qubit 0 first in C order
+        buf = vec.reshape((2,) * n).transpose(tuple(range(n - 1, -1, -1))).ravel()
+        buf /= buf.dtype.type(norm)
+        tensors = [None] * n
+        return cls(tensors, _sweep(buf, 1, n, tensors, max_bond, max_error))
+
+    @property
+    def num_qubits(self):
+        return len(self.tensors)
+
+    @property
+    def bond_dims(self):
+        return [t.shape[2] for t in self.tensors[:-1]]
+
+    @property
+    def nbytes(self):
+        return sum(t.nbytes for t in self.tensors)
+
+    def report(self):
+        return {
+            "qubits": self.num_qubits,
+            "max_bond": max(self.bond_dims, default=1),
+            "nbytes": self.nbytes,
+            "dense_nbytes": (1 << self.num_qubits) * complex_dtype().itemsize,
+            "fidelity": self.fidelity,
+            "fidelity_loss": 1.0 - self.fidelity,
+        }
+
+    def to_statevector(self):
+        """
+        Dense (2^q,) statevector, only meant for checks on small images.
+        """
+        psi = self.tensors[0].reshape(-1, self.tensors[0].shape[2])
+        for t in self.tensors[1:]:
+            psi = (psi @ t.reshape(t.shape[0], -1)).reshape(-1, t.shape[2])
+        psi = psi.reshape((2,) * self.num_qubits)
+        return psi.transpose(tuple(range(self.num_qubits - 1, -1, -1))).ravel()
+
+    def sample(self, shots, seed=None):
+        """
+        Exact sampling of every qubit, left to right: the right-canonical
+        tail makes each conditional a norm of the running bond vector.
+        Returns (shots,) integer outcomes in Qiskit bit order, ready for
+        decoding.outcomes_to_counts.
+        """
+        rng = np.random.default_rng(seed)
+        v = np.ones((shots, 1), dtype=self.tensors[0].dtype)
+        outcomes = np.zeros(shots, dtype=np.int64)
+        rows = np.arange(shots)
+        for k, t in enumerate(self.tensors):
+            w = np.einsum("nl,lsr->nsr", v, t)
+            p = np.sum(w ** 2, axis=2)
+            p /= p.sum(axis=1, keepdims=True)
+            bit = (rng.random(shots) > p[:, 0]).astype(np.int64)
+            v = w[rows, bit] / np.sqrt(p[rows, bit])[:, np.newaxis]
+            outcomes |= bit << k
+        return outcomes
+
+
+def aer_mps_options(max_bond=MPS_MAX_BOND, max_error=MPS_MAX_ERROR):
+    """
+    The same caps as AerSimulator options, for running the circuit
+    builders through aer_executor.AerExecutor with method
+    "matrix_product_state".
+    """
+    return {
+        "matrix_product_state_max_bond_dimension": max_bond,
+        "matrix_product_state_truncation_threshold": max_error,
+    }
+
+# ===============================
+# PLANNER
+# ===============================
+# Estimates are per image: batches are planned and built one image at a
+# time, so every representation is charged one state (plus, for MPS, its
+# sweep workspace). The input image itself is not counted.
+ENCODING_QUBITS = {
+    # encoding -> qubits for n position qubits
+    "frqi": lambda n, n_bits: n + 1,
+    "neqr": lambda n, n_bits: n + n_bits,
+    "amplitude": lambda n, n_bits: n,
+}
+
+
+def _mps_bytes(num_qubits, max_bond, itemsize=8):
+    # Upper bound: bond k is at most 2^min(k, q - k), capped at max_bond
+    total = 0
+    for k in range(num_qubits):
+        left = min(1 << min(k, num_qubits - k), max_bond)
+        right = min(1 << min(k + 1, num_qubits - k - 1), max_bond)
+        total += left * 2 * right * itemsize
+    return total
+
+
+def _sweep_bytes(encoding, n, n_bits, max_bond, itemsize):
+    # Peak workspace of MPSState.from_*: the position buffer, the float64
+    # block, its product and copy-out, and NEQR's code bookkeeping
+    n_pixels = 1 << n
+    work = 3 * SWEEP_CHUNK * 8
+    if encoding == "frqi":
+        return 2 * n_pixels * itemsize + work
+    if encoding == "amplitude":
+        return n_pixels * itemsize + work
+    n_codes = min(n_pixels, 1 << n_bits)
+    keep = min(2 * n_codes, max_bond or 2 * n_codes, n_pixels // 2)
+    # unique()'s sorted copy and inverse, the pair indices, the pair counts
+    bookkeeping = 3 * n_pixels * 8 + 2 * (2 * n_codes) ** 2 * 8
+    return n_pixels // 2 * keep * itemsize + bookkeeping + work
+
+
+def memory_estimates(encoding, size, n_bits=8, max_bond=MPS_MAX_BOND):
+    """
+    Peak bytes for one size x size image in each representation: dense
+    statevector, neqr_sparse codes (NEQR only) and MPSState (sweep
+    workspace plus the bond-capped tensors).
+    """
+    if encoding not in ENCODING_QUBITS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    n_pixels = size * size
+    n = position_qubits(n_pixels)
+    num_qubits = ENCODING_QUBITS[encoding](n, n_bits)
+    real = real_dtype().itemsize
+    estimates = {
+        "dense": (1 << num_qubits) * complex_dtype().itemsize,
+        "mps": (_sweep_bytes(encoding, n, n_bits, max_bond, real)
+                + _mps_bytes(num_qubits, max_bond, real)),
+    }
+    if encoding == "neqr":
+        estimates["sparse"] = n_pixels * np.dtype(code_dtype(n_bits)).itemsize
+    return num_qubits, estimates
+
+
+def plan(encoding, size, n_bits=8, ram_budget=RAM_BUDGET, max_bond=MPS_MAX_BOND):
+    """
+    Representation to simulate one image with: "dense" when it fits
+    ram_budget (exact and fastest), else "sparse" for NEQR (exact, one
+    code per pixel), else "mps". Raises MemoryError when nothing fits.
+    """
+    num_qubits, estimates = memory_estimates(encoding, size, n_bits, max_bond)
+    for method in ("dense", "sparse", "mps"):
+        if method in estimates and estimates[method] <= ram_budget:
+            return {"method": method, "qubits": num_qubits, "bytes": estimates}
+    raise MemoryError(
+        f"{encoding} at {size}x{size} needs {min(estimates.values())} bytes, "
+        f"budget is {ram_budget}"
+    )
+
+
+def _dense_state(encoding, image, n_bits):
+    if encoding == "frqi":
+        return frqi_statevector(image)
+    if encoding == "neqr":
+        from neqr_sparse import SparseNEQRState
+        state = SparseNEQRState.from_images(image, n_bits)
+        return state.to_dense(max_qubits=state.num_qubits)[0]
+    vec = np.asarray(image, dtype=real_dtype()).ravel()
+    norm = np.linalg.norm(vec)
+    if norm == 0:
+        raise ValueError("Cannot amplitude-encode an all-zero image")
+    return (vec / norm).astype(complex_dtype())
+
+
+def build_state(encoding, image, n_bits=8, ram_budget=RAM_BUDGET,
+                max_bond=MPS_MAX_BOND, max_error=MPS_MAX_ERROR):
+    """
+    (plan, state) for one image, with state a dense statevector,
+    a neqr_sparse.SparseNEQRState or an MPSState as planned.
+    """
+    image = np.asarray(image)
+    chosen = plan(encoding, image.shape[0], n_bits, ram_budget, max_bond)
+    method = chosen["method"]
+    if method == "dense":
+        return chosen, _dense_state(encoding, image, n_bits)
+    if method == "sparse":
+        from neqr_sparse import SparseNEQRState
+        return chosen, SparseNEQRState.from_images(image, n_bits)
+    if encoding == "neqr":
+        return chosen, MPSState.from_neqr(image, n_bits, max_bond, max_error)
+    builder = {"frqi": MPSState.from_frqi, "amplitude": MPSState.from_amplitude}[encoding]
+    return chosen, builder(image, max_bond, max_error)
+
+
+if __name__ == "__main__":
+    from qiskit.quantum_info import Statevector
+    from simulate import frqi_circuit, neqr_circuit
+    from metrics_evaluation import build_amplitude
+    import decoding
+
+    rng = np.random.default_rng(0)
+    img = rng.random((4, 4))
+    for name, qc, mps in (
+        ("frqi", frqi_circuit(img), MPSState.from_frqi(img)),
+        ("neqr", neqr_circuit(img, 3), MPSState.from_neqr(img, 3)),
+        ("amplitude", build_amplitude(img), MPSState.from_amplitude(img)),
+    ):
+        err = np.max(np.abs(Statevector(qc).data.real - mps.to_statevector()))
+        print(f"{name:<9} 4x4: max |MPS - circuit| = {err:.1e}")
+
+    # Smooth, medical-like test image: a few Gaussian blobs
+    size = 256
+    y, x = np.mgrid[0:size, 0:size] / size
+    smooth = np.zeros((size, size))
+    for cy, cx, w in rng.random((6, 3)):
+        smooth += np.exp(-((y - cy) ** 2 + (x - cx) ** 2) / (0.02 + 0.05 * w))
+    smooth /= smooth.max()
+
+    for max_bond in (None, 32, 8):
+        start = time.time()
+        mps = MPSState.from_frqi(smooth, max_bond=max_bond, max_error=1e-12)
+        r = mps.report()
+        counts = decoding.outcomes_to_counts(mps.sample(1_000_000, seed=0), mps.num_qubits)
+        psnr = decoding.psnr(smooth, decoding.decode_frqi(counts, smooth.shape))[0]
+        print(f"FRQI {size}x{size} max_bond {str(max_bond):>4}: bond {r['max_bond']:>3}, "
+              f"{r['nbytes'] / 1024:8.1f} KiB vs dense {r['dense_nbytes'] / 1024:.0f} KiB, "
+              f"fidelity loss {r['fidelity_loss']:.2e}, 1M-shot psnr {psnr:.1f} dB "
+              f"({time.time() - start:.2f} s)")
+
+    # NEQR's position/intensity cut has one Schmidt term per distinct code,
+    # so truncating it loses fidelity fast; the planner prefers sparse
+    mps = MPSState.from_neqr(smooth, 8, max_bond=64)
+    print(f"NEQR {size}x{size} 8-bit: {mps.num_qubits} qubits, bond {mps.report()['max_bond']}, "
+          f"fidelity loss {mps.report()['fidelity_loss']:.2e}")
+
+    budget = 512 * 1024 ** 2
+    for encoding, size in (("frqi", 256), ("neqr", 1024), ("frqi", 4096), ("amplitude", 8192),
+                           ("frqi", 16384)):
+        try:
+            p = plan(encoding, size, 8, budget, max_bond=64)
+        except MemoryError as e:
+            print(f"plan {encoding} {size}x{size}: {e}")
+            continue
+        sizes = ", ".join(f"{k} {v / 1024 ** 2:.1f} MiB" for k, v in p["bytes"].items())
+        print(f"plan {encoding} {size}x{size} ({p['qubits']} qubits, 512 MiB): "
+              f"{p['method']}  [{sizes}]")
+
+    # Too big for dense under this budget: build_state must fall back to
+    # an MPS, and stay within the planner's estimate while building it
+    import tracemalloc
+    size, budget = 2048, 100 * 1024 ** 2
+    y, x = np.mgrid[0:size, 0:size] / size
+    large = np.exp(-((y - 0.4) ** 2 + (x - 0.6) ** 2) / 0.05)
+    tracemalloc.start()
+    chosen, state = build_state("frqi", large, ram_budget=budget, max_bond=64)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert chosen["method"] == "mps" and isinstance(state, MPSState), chosen
+    assert peak <= chosen["bytes"]["mps"] <= budget < chosen["bytes"]["dense"]
+    print(f"build_state frqi {size}x{size} in {budget / 1024 ** 2:.0f} MiB: {chosen['method']}, "
+          f"peak {peak / 1024 ** 2:.1f} MiB (estimate {chosen['bytes']['mps'] / 1024 ** 2:.1f}, "
+          f"dense {chosen['bytes']['dense'] / 1024 ** 2:.0f}), "
+          f"fidelity loss {1 - state.fidelity:.1e}")
@@ -0,0 +1,190 @@
+import numpy as np
+from qiskit import QuantumCircuit, transpile
+
+from frqi_statevector import position_qubits
+from neqr_sparse import quantize
+
+# ===============================
+# CUBE MERGING
+# ===============================
+def merge_cubes(minterms, n_bits):
+    """
+    Karnaugh-style cover of a set of n-bit minterms.
+
+    A cube is a (mask, value) pair: bits in mask are fixed to value, the
+    rest are don't-cares. Two cubes with the same mask that differ only in
+    one fixed bit are merged into one cube with that bit freed, repeatedly,
+    until no pair is left. Merged cubes stay disjoint, so the cover is also
+    a valid ESOP (XOR of cubes) and each cube can drive one toggle.
+    """
+    full = (1 << n_bits) - 1
+    val = np.unique(np.asarray(minterms, dtype=np.int64))
+    mask = np.full(val.shape, full, dtype=np.int64)
+
+    changed = True
+    while changed and val.size:
+        changed = False
+        for v in range(n_bits):
+            bit = 1 << v
+            sel = np.flatnonzero(mask & bit)
+            if sel.size < 2:
+                continue
+            key = (mask[sel] << n_bits) | (val[sel] & ~bit)
+            uniq, first, counts = np.unique(key, return_index=True, return_counts=True)
+            pairs = counts == 2
+            if not pairs.any():
+                continue
+
+            merged = np.isin(key, uniq[pairs])
+            keep = np.ones(val.size, dtype=bool)
+            keep[sel[merged]] = False
+            new_mask = mask[sel[first[pairs]]] & ~bit
+            new_val = val[sel[first[pairs]]] & ~bit
+            mask = np.concatenate([mask[keep], new_mask])
+            val = np.concatenate([val[keep], new_val])
+            changed = True
+
+    return mask, val
+
+
+def bit_cover(pixel_bits, n_pos_qubits):
+    """
+    Smallest cover for one intensity bit. When most pixels have the bit set
+    it is cheaper to flip the target once and cover the zeros instead.
+    """
+    on = np.flatnonzero(pixel_bits)
+    off = np.flatnonzero(~pixel_bits)
+    on_cover = merge_cubes(on, n_pos_qubits)
+    off_cover = merge_cubes(off, n_pos_qubits)
+    if off_cover[0].size + 1 < on_cover[0].size:
+        return True, off_cover
+    return False, on_cover
+
+# ===============================
+# OPTIMIZED NEQR BUILDER
+# ===============================
+def _cube_order(mask, val):
+    # Group equal masks and walk values in Gray order so consecutive cubes
+    # need as few polarity flips as possible
+    gray = val ^ (val >> 1)
+    return np.lexsort((gray, mask))
+
+
+def neqr_optimized_circuit(image, n_intensity_qubits=2):
+    """
+    NEQR circuit with the same state as simulate.neqr_circuit, emitting
+    one multi-controlled X per merged cube instead of one per set bit of
+    every pixel. Polarity X gates on position qubits are left in place
+    between cubes and only undone when the next cube needs the other
+    polarity (or at the very end).
+    """
+    n_pixels = image.size
+    n_pos_qubits = position_qubits(n_pixels)
+    codes = quantize(np.asarray(image).flatten(), n_intensity_qubits).astype(np.int64)
+
+    qc = QuantumCircuit(n_pos_qubits + n_intensity_qubits)
+    for i in range(n_pos_qubits):
+        qc.h(i)
+
+    flipped = np.zeros(n_pos_qubits, dtype=bool)
+    for bit in range(n_intensity_qubits):
+        target = n_pos_qubits + bit
+        complement, (mask, val) = bit_cover((codes >> bit) & 1 == 1, n_pos_qubits)
+        if complement:
+            qc.x(target)
+
+        for c in _cube_order(mask, val):
+            # Pixel-index bit j lives on qubit n - 1 - j
+            controls = []
+            for j in range(n_pos_qubits):
+                if not (mask[c] >> j) & 1:
+                    continue
+                q = n_pos_qubits - 1 - j
+                want_flip = not (val[c] >> j) & 1
+                if flipped[q] != want_flip:
+                    qc.x(q)
+                    flipped[q] = want_flip
+                controls.append(q)
+
+            if not controls:
+                qc.x(target)
+            elif len(controls) == 1:
+                qc.cx(controls[0], target)
+            else:
+                qc.mcx(controls, target)
+
+    for q in np.flatnonzero(flipped):
+        qc.x(int(q))
+    return qc
+
+# ===============================
+# GATE REPORT
+# ===============================
+def multi_controlled_count(qc):
+    return sum(1 for inst in qc.data if len(inst.qubits) > 1)
+
+
+def neqr_gate_report(images, n_intensity_qubits=2, basis_gates=None):
+    """
+    Gate count, multi-controlled gate count and depth of
+    simulate.neqr_circuit next to neqr_optimized_circuit for each
+    {name: image}. With basis_gates the circuits are also transpiled.
+    """
+    from simulate import neqr_circuit
+
+    report = {}
+    for name, image in images.items():
+        row = {}
+        for label, build in (("before", neqr_circuit), ("after", neqr_optimized_circuit)):
+            qc = build(image, n_intensity_qubits)
+            row[label] = {
+                "gates": qc.size(),
+                "mc_gates": multi_controlled_count(qc),
+                "depth": qc.depth(),
+            }
+            if basis_gates:
+                compiled = transpile(qc, basis_gates=basis_gates, optimization_level=0)
+                row[label]["basis_gates"] = compiled.size()
+                row[label]["basis_depth"] = compiled.depth()
+        report[name] = row
+    return report
+
+
+def print_report(report):
+    print(f"{'dataset':<14} {'gates':>15} {'mc gates':>15} {'depth':>15}")
+    for name, row in report.items():
+        b, a = row["before"], row["after"]
+        print(f"{name:<14} "
+              f"{b['gates']:>7}->{a['gates']:<7} "
+              f"{b['mc_gates']:>7}->{a['mc_gates']:<7} "
+              f"{b['depth']:>7}->{a['depth']:<7}")
+
+
+if __name__ == "__main__":
+    import os
+    import cv2
+    from qiskit.quantum_info import Statevector
+    from simulate import DATASETS, neqr_circuit
+
+    size, bits = 16, 8
+    images = {}
+    for name, path in DATASETS.items():
+        if os.path.exists(path):
+            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            images[name] = cv2.resize(img, (size, size)) / 255.0
+
+    if not images:
+        print("Dataset images not found, using a synthetic SAR-like scene")
+        rng = np.random.default_rng(0)
+        scene = np.full((size, size), 0.2)
+        scene[5:9, 6:11] = 0.9
+        images["synthetic"] = np.clip(scene + rng.normal(0, 0.01, scene.shape), 0, 1)
+
+    small = next(iter(images.values()))[:4, :4]
+    err = np.max(np.abs(
+        Statevector(neqr_optimized_circuit(small, 4)).data
+        - Statevector(neqr_circuit(small, 4)).data
+    ))
+    print(f"4x4 @ 4 bits: max |optimized - original| = {err:.2e}")
+
+    print_report(neqr_gate_report(images, bits))
@@ -0,0 +1,163 @@
+import time
+import numpy as np
+
+from frqi_statevector import as_batch, bit_reverse_indices, position_qubits
+from precision import complex_dtype, real_dtype
+
+# ===============================
+# INTENSITY CODES
+# ===============================
+def code_dtype(n_bits):
+    if not 1 <= n_bits <= 32:
+        raise ValueError(f"NEQR bit depth must be in [1, 32], got {n_bits}")
+    if n_bits <= 8:
+        return np.uint8
+    if n_bits <= 16:
+        return np.uint16
+    return np.uint32
+
+
+def quantize(images, n_bits):
+    """
+    Intensity codes for images normalized to [0, 1], truncated the same
+    way simulate.neqr_circuit does it.
+    """
+    levels = (1 << n_bits) - 1
+    images = np.asarray(images)
+    # float32 truncates to the same codes as float64 up to 8 bits
+    work = np.float32 if images.dtype == np.float32 and n_bits <= 8 else np.float64
+    scaled = np.clip(images.astype(work, copy=False), 0.0, 1.0) * work(levels)
+    return scaled.astype(code_dtype(n_bits))
+
+# ===============================
+# SPARSE NEQR STATE
+# ===============================
+class SparseNEQRState:
+    """
+    NEQR state 1/2^(n/2) Σ_i |C_i>|i> stored as one intensity code per
+    position instead of a 2^(n + q) statevector.
+
+    codes has shape (B, H, W). Every position carries the same amplitude,
+    so the codes alone describe the state and memory grows with the pixel
+    count, not with the number of qubits.
+    """
+
+    def __init__(self, codes, n_bits):
+        codes = np.asarray(codes)
+        if codes.ndim == 2:
+            codes = codes[np.newaxis]
+        position_qubits(codes.shape[1] * codes.shape[2])
+        self.n_bits = n_bits
+        self.codes = np.ascontiguousarray(codes, dtype=code_dtype(n_bits))
+
+    @classmethod
+    def from_images(cls, images, n_bits=8):
+        batch, _ = as_batch(images)
+        return cls(quantize(batch, n_bits), n_bits)
+
+    @property
+    def n_images(self):
+        return self.codes.shape[0]
+
+    @property
+    def shape(self):
+        return self.codes.shape[1:]
+
+    @property
+    def n_pixels(self):
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def n_pos_qubits(self):
+        return position_qubits(self.n_pixels)
+
+    @property
+    def num_qubits(self):
+        return self.n_pos_qubits + self.n_bits
+
+    @property
+    def amplitude(self):
+        return 1.0 / np.sqrt(self.n_pixels)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    def decode(self, dtype=None):
+        """
+        Images back in [0, 1], shape (B, H, W).
+        """
+        dtype = real_dtype(dtype)
+        levels = (1 << self.n_bits) - 1
+        return self.codes.astype(dtype) / dtype.type(levels)
+
+    def basis_indices(self):
+        """
+        Qiskit basis index of every nonzero amplitude, shape (B, H * W),
+        in row-major pixel order.
+        """
+        n = self.n_pos_qubits
+        codes = self.codes.reshape(self.n_images, -1).astype(np.uint64)
+        pos = bit_reverse_indices(n).astype(np.uint64)
+        return (codes << np.uint64(n)) | pos
+
+    def to_dense(self, dtype=None, max_qubits=26):
+        """
+        Dense (B, 2^(n + q)) statevector, only meant for small images.
+        """
+        if self.num_qubits > max_qubits:
+            raise MemoryError(
+                f"Dense NEQR state needs 2^{self.num_qubits} amplitudes per image"
+            )
+        state = np.zeros((self.n_images, 1 << self.num_qubits), dtype=complex_dtype(dtype))
+        rows = np.arange(self.n_images)[:, np.newaxis]
+        state[rows, self.basis_indices().astype(np.int64)] = self.amplitude
+        return state
+
+    def sample(self, shots, seed=None):
+        """
+        Exact measurement sampling of the full register.
+
+        Measuring |i> fixes |C_i> deterministically, so outcomes follow a
+        uniform multinomial over positions. Returns counts of shape
+        (B, H * W) aligned with basis_indices().
+        """
+        rng = np.random.default_rng(seed)
+        probs = np.full(self.n_pixels, 1.0 / self.n_pixels)
+        return rng.multinomial(shots, probs, size=self.n_images)
+
+    def counts_dict(self, counts, image=0):
+        """
+        Qiskit-style {bitstring: count} for one image, skipping zero counts.
+        """
+        width = self.num_qubits
+        keys = self.basis_indices()[image]
+        return {
+            format(int(k), f"0{width}b"): int(c)
+            for k, c in zip(keys, counts[image]) if c
+        }
+
+
+if __name__ == "__main__":
+    from qiskit.quantum_info import Statevector
+    from simulate import neqr_circuit
+
+    rng = np.random.default_rng(0)
+    for size, bits in ((2, 2), (4, 3), (4, 4)):
+        img = rng.random((size, size))
+        ref = Statevector(neqr_circuit(img, bits)).data
+        sparse = SparseNEQRState.from_images(img, bits)
+        err = np.max(np.abs(sparse.to_dense()[0] - ref))
+        print(f"{size}x{size}, {bits} bits: max |sparse - circuit| = {err:.2e}")
+
+    batch = rng.random((8, 256, 256))
+    start = time.time()
+    state = SparseNEQRState.from_images(batch, n_bits=8)
+    counts = state.sample(1_000_000, seed=1)
+    decoded = state.decode()
+    print(
+        f"8 x 256x256 @ 8 bits: {state.num_qubits} qubits, "
+        f"{state.nbytes / 2**20:.2f} MiB sparse vs "
+        f"{state.n_images * 16 * 2**state.num_qubits / 2**30:.1f} GiB dense, "
+        f"{time.time() - start:.4f} s"
+    )
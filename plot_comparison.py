@@ -1,6 +1,11 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from resource_estimator import estimate
+
+IMAGE_SIZE = 128  # 128x128 image
+NEQR_BITS = 8
+
 # Models
 models = [
     "FRQI",
@@ -10,13 +15,13 @@ models = [
     "Amplitude"
 ]
 
-# Gate counts (use realistic + your evaluated values)
+# Gate counts after decomposition to cx + u (analytic, no circuit built)
 gates = [
-    16384,   # FRQI (very high)
-    32768,   # NEQR (very very high)
-    12,      # QRAM
-    3,       # MCQI
-    1        # Amplitude
+    estimate("frqi", IMAGE_SIZE)["basis_gates"],                    # FRQI
+    estimate("neqr", IMAGE_SIZE, NEQR_BITS)["basis_gates"],         # NEQR
+    estimate("qram", IMAGE_SIZE)["basis_gates"],                    # QRAM
+    estimate("mcqi", IMAGE_SIZE)["basis_gates"],                    # MCQI
+    estimate("amplitude", IMAGE_SIZE)["basis_gates"]                # Amplitude
 ]
 
 # Colors based on complexity
@@ -36,7 +41,7 @@ bars = plt.bar(models, gates, color=colors)
 plt.yscale("log")
 
 plt.xlabel("Quantum Image Representation Models")
-plt.ylabel("Gate Complexity (log scale)")
+plt.ylabel(f"Gate Complexity, cx + u ({IMAGE_SIZE}x{IMAGE_SIZE}, log scale)")
 plt.title("Comparison of Quantum Image Representations based on Gate Complexity")
 
 # Annotate values
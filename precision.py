@@ -0,0 +1,139 @@
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+# ===============================
+# PRECISION POLICY
+# ===============================
+# name -> (real dtype, complex dtype)
+PRECISIONS = {
+    "single": (np.float32, np.complex64),
+    "double": (np.float64, np.complex128),
+}
+DEFAULT_PRECISION = os.environ.get("QIR_PRECISION", "double")
+
+# Accuracy of "single" against "double", for images normalized to [0, 1]:
+#
+# - Loading: k / 255 is rounded once, error <= 2^-24 (6e-8) per pixel.
+#   NEQR codes quantized from float32 match float64 for every 8-bit level
+#   and bit depths up to 8.
+# - State builders: complex64 amplitudes are within ~1e-7 of complex128;
+#   the norm of a statevector drifts by at most ~sqrt(log2 N) * 6e-8.
+# - Samplers: numpy's multinomial works in float64, so each image's
+#   probability vector is widened there, one image at a time. Shot
+#   statistics are the same; per-position probabilities differ by <= 1.2e-7.
+# - Metrics: inputs stay float32, reductions accumulate in float64.
+#   On the self-check below PSNR agrees to ~1e-5 dB and SSIM to ~1e-7.
+#
+# Circuit angles (frqi_compiler, amplitude_prep, circuit_templates) are
+# always computed in float64: they become Python floats in the circuit.
+
+
+def set_precision(name):
+    global _current
+    if name not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {name}")
+    _current = name
+
+
+# A bad QIR_PRECISION fails here, on import, not at the first dtype lookup
+set_precision(DEFAULT_PRECISION)
+
+
+def get_precision():
+    return _current
+
+
+@contextmanager
+def precision(name):
+    """
+    Run a block under another precision, restoring the previous one.
+    """
+    previous = _current
+    set_precision(name)
+    try:
+        yield
+    finally:
+        set_precision(previous)
+
+
+def real_dtype(dtype=None):
+    """
+    dtype if given, else the policy's real dtype.
+    """
+    return np.dtype(dtype if dtype is not None else PRECISIONS[_current][0])
+
+
+def complex_dtype(dtype=None):
+    """
+    dtype if given, else the policy's complex dtype.
+    """
+    return np.dtype(dtype if dtype is not None else PRECISIONS[_current][1])
+
+
+def real_of(dtype):
+    """
+    float32 for complex64, float64 for complex128.
+    """
+    return np.finfo(dtype).dtype
+
+
+def to_unit(img, dtype=None):
+    """
+    8-bit image -> [0, 1] in the policy's real dtype, without a float64
+    intermediate.
+    """
+    dtype = real_dtype(dtype)
+    return np.asarray(img).astype(dtype) / dtype.type(255)
+
+
+if __name__ == "__main__":
+    # Go through the imported module: the other modules read its policy,
+    # not this __main__ copy
+    import precision as policy
+    import decoding
+    import shot_sampler
+    from frqi_statevector import frqi_statevector
+    from generate_outputs import MODELS
+
+    # float32 fidelity metrics must stay within these of the float64 ones.
+    # PSNR above 100 dB only measures rounding, so it is not compared.
+    TOLERANCE = {"mse": 1e-6, "psnr": 1e-3, "ssim": 1e-3}
+
+    rng = np.random.default_rng(0)
+    raw = rng.integers(0, 256, (16, 64, 64), dtype=np.uint8)
+    results = {}
+    for name in PRECISIONS:
+        with policy.precision(name):
+            images = policy.to_unit(raw)
+            decoded = decoding.decode_frqi(np.abs(frqi_statevector(images)) ** 2, (64, 64))
+            counts = shot_sampler.sample("frqi", images, 100_000, seed=0)
+            sampled = decoding.decode_frqi(counts, (64, 64))
+            outputs = {model: fn(images) for model, fn in MODELS.items()}
+            results[name] = {
+                "dtypes": {images.dtype, decoded.dtype, sampled.dtype,
+                           *(o.dtype for o in outputs.values())},
+                "exact": decoding.fidelity_report(images, decoded),
+                "shots": decoding.fidelity_report(images, sampled),
+                "models": {m: decoding.fidelity_report(images, o) for m, o in outputs.items()},
+            }
+
+    single, double = results["single"], results["double"]
+    print("single dtypes:", sorted(str(d) for d in single["dtypes"]),
+          "| double dtypes:", sorted(str(d) for d in double["dtypes"]))
+    ok = single["dtypes"] == {np.dtype(np.float32)}
+
+    pairs = [("exact decode", single["exact"], double["exact"]),
+             ("100k shots", single["shots"], double["shots"])]
+    pairs += [(f"model {m}", single["models"][m], double["models"][m]) for m in MODELS]
+    for label, s, d in pairs:
+        diffs = {}
+        for metric, tol in TOLERANCE.items():
+            compared = d[metric] < 100 if metric == "psnr" else np.isfinite(d[metric])
+            diff = np.abs(s[metric][compared] - d[metric][compared])
+            diffs[metric] = float(diff.max()) if diff.size else 0.0
+            ok &= diffs[metric] <= tol
+        print(f"{label:<14} " + "  ".join(f"{m} {v:.1e}" for m, v in diffs.items()))
+    print("float32 within tolerance:", bool(ok))
+    raise SystemExit(0 if ok else 1)
@@ -1,18 +1,125 @@
-import cv2
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
-def preprocess_image(path, size=2):
-    # Read image in grayscale
-    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+from precision import real_dtype, to_unit
+from tracing import span
+
+DATASET_DIRS = {
+    "brain_tumor": "data/brain_tumor",
+    "nist": "data/nist",
+    "sar_earthdata": "data/sar_earthdata",
+    "sar_iceye": "data/sar_iceye",
+    "ssdd_ship": "data/ssdd_ship",
+}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+def preprocess_image(path, size=2, rgb=False, dtype=None):
+    import cv2  # deferred so importing this module stays cheap
+
+    # Read image in grayscale (or colour, converted from OpenCV's BGR)
+    with span("imread", items=1):
+        img = cv2.imread(path, cv2.IMREAD_COLOR if rgb else cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise FileNotFoundError(f"Image not found: {path}")
+    if rgb:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
-    # Resize to size x size (2x2 for FRQI simplicity)
-    img = cv2.resize(img, (size, size))
+    # Resize to size x size (2x2 for FRQI simplicity); None keeps full resolution
+    if size is not None:
+        with span("resize", items=1):
+            img = cv2.resize(img, (size, size))
 
-    # Normalize pixel values to [0,1]
-    img = img / 255.0
+    # Normalize pixel values to [0,1] in the precision policy's dtype
+    img = to_unit(img, dtype)
 
     return img
 
+# ===============================
+# STREAMING DATASET LOADER
+# ===============================
+def find_images(root, extensions=IMAGE_EXTENSIONS):
+    """
+    Lazily walk a dataset directory (or yield a single file), in sorted
+    order so every run sees the images in the same sequence.
+    """
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions):
+                yield os.path.join(dirpath, name)
+
+
+def _decode(path, size, rgb, dtype, cache):
+    # cv2 releases the GIL while decoding and resizing
+    try:
+        if cache is not None:
+            return path, cache.load(path, size, rgb, dtype)
+        return path, preprocess_image(path, size, rgb, dtype)
+    except FileNotFoundError:
+        return path, None
+
+
+def iter_batches(root, size=2, rgb=False, batch_size=32, workers=4,
+                 dtype=None, drop_last=False, cache=None):
+    """
+    Yield (paths, images) batches from a dataset directory.
+
+    Images are decoded by a thread pool with at most 2 * batch_size
+    decodes in flight, so memory stays bounded however large the folder
+    is. Each batch is a contiguous (B, size, size[, 3]) array; the last
+    one may be shorter unless drop_last is set. Unreadable files are
+    skipped. With an image_cache.ImageCache, decoded images are reused
+    across runs. dtype defaults to the precision policy's real dtype.
+    """
+    dtype = real_dtype(dtype)
+    shape = (size, size, 3) if rgb else (size, size)
+    paths = find_images(root)
+    pending = deque()
+
+    def fill(pool):
+        while len(pending) < 2 * batch_size:
+            path = next(paths, None)
+            if path is None:
+                return
+            pending.append(pool.submit(_decode, path, size, rgb, dtype, cache))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fill(pool)
+        batch = np.empty((batch_size,) + shape, dtype=dtype)
+        batch_paths = []
+        while pending:
+            path, img = pending.popleft().result()
+            fill(pool)
+            if img is None:
+                print(f"Skipping unreadable image: {path}")
+                continue
+            batch[len(batch_paths)] = img
+            batch_paths.append(path)
+            if len(batch_paths) == batch_size:
+                yield batch_paths, batch
+                batch = np.empty((batch_size,) + shape, dtype=dtype)
+                batch_paths = []
+
+        if batch_paths and not drop_last:
+            yield batch_paths, np.ascontiguousarray(batch[:len(batch_paths)])
+
+
+def iter_datasets(datasets=DATASET_DIRS, **kwargs):
+    """
+    Yield (dataset, paths, images) batches for every dataset directory.
+    """
+    for name, root in datasets.items():
+        for paths, images in iter_batches(root, **kwargs):
+            yield name, paths, images
+
+
 if __name__ == "__main__":
     image = preprocess_image("data/sample.png")
     print("Preprocessed Image:\n", image)
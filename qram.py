@@ -1,32 +1,186 @@
-from qiskit import QuantumCircuit
+import time
 import numpy as np
-import matplotlib.pyplot as plt
+from qiskit import QuantumCircuit
+
+from frqi_compiler import uniformly_controlled_rotation
+from frqi_statevector import bit_reverse_indices, position_qubits
+from precision import real_dtype
+
+# ===============================
+# QRAM
+# ===============================
+# N = 2^n memory cells holding values v_a in [0, 1]. A query maps
+#   Σ_a α_a |a> |0>  ->  Σ_a α_a |a> (sqrt(1 - v_a^2) |0> + v_a |1>)
+# i.e. RY(2 arcsin v_a) on the data qubit, conditioned on the address.
+# Address qubit q holds bit n-1-q of a, as in the other builders, and the
+# data qubit is qubit n.
+class QRAM:
+    """
+    Address-controlled loader circuit plus a classical emulator.
+
+    The emulator keeps the data-qubit amplitudes of every cell in one
+    contiguous (N, 2) table, so a batch of classical addresses is a
+    single gather and a batch of address superpositions one broadcast
+    multiply. resources() does the bucket-brigade accounting for the
+    same queries.
+    """
+
+    def __init__(self, memory):
+        memory = np.asarray(memory, dtype=real_dtype()).ravel()
+        if memory.min(initial=0) < 0 or memory.max(initial=0) > 1:
+            raise ValueError("QRAM cells must hold values in [0, 1]")
+        self.n = position_qubits(memory.size)
+        self.memory = np.ascontiguousarray(memory)
+        self.table = np.ascontiguousarray(
+            np.stack([np.sqrt(1 - memory ** 2), memory], axis=1)
+        )
+
+    @classmethod
+    def from_image(cls, image):
+        return cls(np.asarray(image).ravel())
+
+    @property
+    def size(self):
+        return self.memory.size
+
+    # ---------- loader circuit ----------
+
+    def circuit(self, superpose=False):
+        """
+        The query as a circuit on n address qubits and the data qubit: one
+        uniformly controlled RY with the address as controls (2^n RY and
+        2^n CNOT gates). With superpose, Hadamards first put the address
+        register in uniform superposition, which loads the whole image.
+        """
+        qc = QuantumCircuit(self.n + 1)
+        if superpose:
+            for q in range(self.n):
+                qc.h(q)
+        angles = 2 * np.arcsin(self.memory.astype(np.float64))
+        uniformly_controlled_rotation(qc, "y", angles[bit_reverse_indices(self.n)],
+                                      range(self.n), self.n)
+        return qc
+
+    # ---------- emulator ----------
+
+    def _addresses(self, addresses):
+        addresses = np.asarray(addresses)
+        if addresses.size and (addresses.min() < 0 or addresses.max() >= self.size):
+            raise IndexError(f"QRAM addresses must be in [0, {self.size})")
+        return addresses
+
+    def _amplitudes(self, address_amplitudes):
+        amps = np.asarray(address_amplitudes)
+        if amps.shape[-1] != self.size:
+            raise ValueError(f"Expected {self.size} address amplitudes, got {amps.shape[-1]}")
+        return amps
+
+    def load(self, addresses):
+        """
+        Data-qubit amplitudes (..., 2) for integer addresses of any shape.
+        """
+        # take() is a plain gather; fancy indexing is several times slower
+        return np.take(self.table, self._addresses(addresses), axis=0)
+
+    def query(self, address_amplitudes):
+        """
+        Joint state after querying address superpositions (N,) or (B, N),
+        indexed by address value. Returns (2, N) or (B, 2, N): entry
+        [d, a] is the amplitude of |a>|d>.
+        """
+        amps = self._amplitudes(address_amplitudes)
+        return amps[..., np.newaxis, :] * self.table.T
+
+    def statevector(self, address_amplitudes):
+        """
+        query() laid out like the circuit's statevector: (2^(n+1),) or
+        (B, 2^(n+1)), data qubit on top, address bits reversed.
+        """
+        joint = self.query(address_amplitudes)
+        out = np.empty_like(joint)
+        out[..., bit_reverse_indices(self.n)] = joint
+        return out.reshape(joint.shape[:-2] + (-1,))
+
+    # ---------- bucket-brigade accounting ----------
+
+    def resources(self, addresses=None, amplitudes=None):
+        """
+        Bucket-brigade cost of each query, given either classical integer
+        addresses (Q,) or address amplitudes (N,) or (B, N) as for
+        query(); a superposition only wakes the routers on the paths to
+        addresses with nonzero amplitude.
 
-# 2x2 image pixel values
-pixels = [0.2, 0.5, 0.7, 0.9]
+        Per query: "routers" active out of N - 1, "cells" read, and
+        "time_steps": routing address bit k down k + 1 levels, sending the
+        bus down and up the n levels, then unrouting
+        (n(n + 1) + 2n in total, independent of the superposition).
+        """
+        n = self.n
+        steps = n * (n + 1) + 2 * n
+        if (addresses is None) == (amplitudes is None):
+            raise ValueError("Pass exactly one of addresses or amplitudes")
+        if addresses is not None:
+            count = self._addresses(addresses).size
+            routers = np.full(count, n)
+            cells = np.ones(count, dtype=np.int64)
+        else:
+            support = self._amplitudes(amplitudes).reshape(-1, self.size) != 0
+            cells = support.sum(axis=1)
+            # Active routers at depth k: distinct k-bit address prefixes
+            routers = sum(
+                support.reshape(support.shape[0], 1 << k, -1).any(axis=2).sum(axis=1)
+                for k in range(n)
+            )
+            count = support.shape[0]
+        return {
+            "queries": count,
+            "total_routers": self.size - 1,
+            "routers": routers,
+            "cells": cells,
+            "time_steps": np.full(count, steps),
+        }
 
-# 2 address qubits + 1 data qubit
-qc = QuantumCircuit(3)
 
-for i, value in enumerate(pixels):
-    binary = format(i, '02b')
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from qiskit.quantum_info import Statevector
 
-    # Set address qubits
-    if binary[0] == '1':
-        qc.x(0)
-    if binary[1] == '1':
-        qc.x(1)
+    rng = np.random.default_rng(0)
+    small = QRAM(rng.random(16))
+    uniform = np.full(16, 0.25)
+    err = np.max(np.abs(Statevector(small.circuit(superpose=True)).data
+                        - small.statevector(uniform)))
+    print(f"16 cells: max |emulator - circuit| = {err:.2e}")
+    for a in (3, 12):
+        basis = Statevector.from_int(int(bit_reverse_indices(4)[a]), 2 ** 5)
+        out = basis.evolve(small.circuit()).data
+        print(f"address {a}: circuit data amplitudes "
+              f"{np.round(out[[bit_reverse_indices(4)[a], 16 + bit_reverse_indices(4)[a]]].real, 6)}"
+              f", emulator {np.round(small.load(a), 6)}")
 
-    # Encode pixel value in data qubit
-    qc.ry(2 * np.arcsin(value), 2)
+    memory = QRAM.from_image(rng.random((1024, 1024)))
+    addresses = rng.integers(0, memory.size, 10_000_000)
+    start = time.perf_counter()
+    memory.load(addresses)
+    elapsed = time.perf_counter() - start
+    print(f"{addresses.size:,} classical queries on {memory.size:,} cells: "
+          f"{addresses.size / elapsed / 1e6:.1f} M addresses/s")
 
-    # Reset address qubits
-    if binary[0] == '1':
-        qc.x(0)
-    if binary[1] == '1':
-        qc.x(1)
+    # Superpositions over a few hundred addresses each
+    amps = np.zeros((64, memory.size), dtype=real_dtype())
+    for row in amps:
+        row[rng.choice(memory.size, 256, replace=False)] = 1 / 16
+    start = time.perf_counter()
+    memory.query(amps)
+    elapsed = time.perf_counter() - start
+    cost = memory.resources(amplitudes=amps)
+    print(f"64 superposition queries x {memory.size:,} addresses: "
+          f"{amps.size / elapsed / 1e6:.1f} M address amplitudes/s, "
+          f"routers {cost['routers'].mean():.0f} of {cost['total_routers']:,}, "
+          f"{cost['time_steps'][0]} time steps per query")
 
-# Draw, save, and show circuit
-qc.draw(output='mpl')
-plt.savefig("qram_circuit.png")
-plt.show()
+    # 2x2 image pixel values
+    pixels = [0.2, 0.5, 0.7, 0.9]
+    QRAM(pixels).circuit().draw(output='mpl')
+    plt.savefig("qram_circuit.png")
+    plt.show()
@@ -0,0 +1,271 @@
+import time
+import numpy as np
+
+from frqi_statevector import position_qubits
+
+# ===============================
+# PRIMITIVE COSTS
+# ===============================
+# Cost of one mcry / mcx with k controls as (gates, depth, cx) after
+# decomposition to cx + u, for the qiskit release in requirements.txt.
+# mcry is exact for generic angles; a zero angle saves up to two u gates.
+# Above the tables both follow closed forms; validate() rechecks them.
+MCRY_RAW = {1: (4, 4), 2: (4, 4), 3: (13, 13)}
+MCRY_BASIS = {
+    1: (4, 4, 2), 2: (32, 23, 12), 3: (55, 42, 20),
+    4: (64, 44, 24), 5: (106, 86, 40), 6: (148, 123, 56), 7: (220, 171, 80),
+}
+MCX_BASIS = {1: (1, 1, 1), 2: (15, 11, 6), 3: (31, 27, 14), 4: (105, 81, 36)}
+
+
+def mcry_raw(k):
+    return MCRY_RAW.get(k, (8, 8))
+
+
+def mcry_basis(k):
+    if k in MCRY_BASIS:
+        return MCRY_BASIS[k]
+    depth = 279 + 56 * (k - 9) if k % 2 else 219 + 56 * (k - 8)
+    return 72 * k - 284, depth, 24 * k - 88
+
+
+def mcx_basis(k):
+    if k in MCX_BASIS:
+        return MCX_BASIS[k]
+    return 6 * 2 ** k - 5, 5 * 2 ** k - 4, 3 * 2 ** k - 4
+
+
+def _serial_depth(n, n_blocks, block_depth):
+    # H layer, the X layer before pixel 0, then the pixel blocks. Between
+    # consecutive pixels the undo/redo X gates stack two deep on a shared
+    # zero bit, which every transition has except the n of the form
+    # 2^n - 1 - 2^p -> 2^n - 2^p.
+    n_pixels = 1 << n
+    return 2 + n_blocks * block_depth + 2 * (n_pixels - 1 - n) + n
+
+# ===============================
+# PER-ENCODING ESTIMATES
+# ===============================
+def _frqi(n, n_bits, ones):
+    N = 1 << n
+    raw_gates, raw_depth = mcry_raw(n)
+    b_gates, b_depth, b_cx = mcry_basis(n)
+    return {
+        "qubits": n + 1,
+        "gates": n + n * N + N * raw_gates,
+        "depth": _serial_depth(n, N, raw_depth),
+        "basis_gates": n + n * N + N * b_gates,
+        "basis_depth": _serial_depth(n, N, b_depth),
+        "cx": N * b_cx,
+        "exact_depth": False,
+    }
+
+
+def _frqi_ucr(n, n_bits, ones):
+    N = 1 << n
+    return {
+        "qubits": n + 1,
+        "gates": n + 2 * N,
+        "depth": 2 * N,
+        "basis_gates": n + 2 * N,
+        "basis_depth": 2 * N,
+        "cx": N,
+        "exact_depth": True,
+    }
+
+
+def _neqr(n, n_bits, ones):
+    N = 1 << n
+    b_gates, b_depth, b_cx = mcx_basis(n)
+    return {
+        "qubits": n + n_bits,
+        "gates": n + n * N + ones,
+        "depth": _serial_depth(n, ones, 1),
+        "basis_gates": n + n * N + ones * b_gates,
+        "basis_depth": _serial_depth(n, ones, b_depth),
+        "cx": ones * b_cx,
+        "exact_depth": False,
+    }
+
+
+def _neqr_ucr(n, n_bits, ones):
+    N = 1 << n
+    depth = 2 * n_bits * N - 3 * (n_bits - 1)
+    return {
+        "qubits": n + n_bits,
+        "gates": n + 2 * n_bits * N,
+        "depth": depth,
+        "basis_gates": n + 2 * n_bits * N,
+        "basis_depth": depth,
+        "cx": n_bits * N,
+        "exact_depth": True,
+    }
+
+
+def _qram(n, n_bits, ones):
+    # QRAM loader with an address superposition: the FRQI ladder with
+    # 2 arcsin v angles
+    return _frqi_ucr(n, n_bits, ones)
+
+
+def _mcqi(n, n_bits, ones):
+    # FRQI's ladder with the 2 channel qubits as extra controls
+    return _frqi_ucr(n + 2, n_bits, ones) | {"qubits": n + 3}
+
+
+def _amplitude_initialize(n, n_bits, ones):
+    # initialize() is one opaque gate until it is decomposed into resets
+    # and multiplexed rotations
+    N = 1 << n
+    cx = max(N - 2, 0)
+    return {
+        "qubits": n,
+        "gates": 1,
+        "depth": 1,
+        "basis_gates": (N - 1) + cx + n,
+        "basis_depth": 2 * N - (n + 1),
+        "cx": cx,
+        "exact_depth": True,
+    }
+
+
+def _amplitude_tree(n, n_bits, ones):
+    N = 1 << n
+    return {
+        "qubits": n,
+        "gates": 2 * N - 3,
+        "depth": 2 * N - n - 2,
+        "basis_gates": 2 * N - 3,
+        "basis_depth": 2 * N - n - 2,
+        "cx": N - 2,
+        "exact_depth": True,
+    }
+
+
+ESTIMATORS = {
+    "frqi": _frqi,                      # simulate.frqi_circuit
+    "frqi_ucr": _frqi_ucr,              # frqi_compiler / frqi template
+    "neqr": _neqr,                      # simulate.neqr_circuit
+    "neqr_ucr": _neqr_ucr,              # neqr template
+    "qram": _qram,                      # metrics_evaluation.build_qram
+    "mcqi": _mcqi,                      # metrics_evaluation.build_mcqi
+    "amplitude": _amplitude_tree,       # metrics_evaluation.build_amplitude
+    "amplitude_initialize": _amplitude_initialize,  # qc.initialize
+    "amplitude_tree": _amplitude_tree,  # amplitude template
+}
+
+
+def estimate(encoding, size, n_bits=2, image=None, set_bit_fraction=0.5):
+    """
+    Qubits, gates and depth of an encoding of a size x size image, raw and
+    after decomposition to cx + u, without building the circuit.
+
+    NEQR gate counts depend on how many intensity bits are set: they are
+    counted from image when one is given, otherwise set_bit_fraction of
+    all bits are assumed set. Depths flagged exact_depth=False are upper
+    bounds for the per-pixel builders, whose pixel blocks partly overlap.
+    """
+    if encoding not in ESTIMATORS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    n = position_qubits(size * size)
+    if image is not None:
+        from neqr_sparse import quantize
+        codes = quantize(np.asarray(image).ravel(), n_bits).astype(np.int64)
+        ones = int(sum(((codes >> b) & 1).sum() for b in range(n_bits)))
+    else:
+        ones = int(round((1 << n) * n_bits * set_bit_fraction))
+    return ESTIMATORS[encoding](n, n_bits, ones)
+
+
+def sweep(encodings=tuple(ESTIMATORS), sizes=None, n_bits=2):
+    """
+    {encoding: {size: estimate}} for power-of-two sizes, 2x2 to 4096x4096
+    by default.
+    """
+    sizes = sizes or [2 ** k for k in range(1, 13)]
+    return {enc: {s: estimate(enc, s, n_bits) for s in sizes} for enc in encodings}
+
+# ===============================
+# VALIDATION
+# ===============================
+def _build(encoding, image, n_bits):
+    from qiskit import QuantumCircuit
+    from circuit_templates import get_template
+    from frqi_compiler import frqi_ucr_circuit
+    from metrics_evaluation import build_amplitude
+    from simulate import frqi_circuit, neqr_circuit
+
+    size = image.shape[0]
+    if encoding == "frqi":
+        return frqi_circuit(image)
+    if encoding == "frqi_ucr":
+        return frqi_ucr_circuit(image)
+    if encoding == "neqr":
+        return neqr_circuit(image, n_bits)
+    if encoding == "neqr_ucr":
+        return get_template("neqr", size, n_bits, optimization_level=0).circuit
+    if encoding == "qram":
+        return get_template("qram", size, optimization_level=0).circuit
+    if encoding == "mcqi":
+        return get_template("mcqi", size, optimization_level=0).circuit
+    if encoding == "amplitude":
+        return build_amplitude(image)
+    if encoding == "amplitude_initialize":
+        n = position_qubits(image.size)
+        qc = QuantumCircuit(n)
+        qc.initialize(image.flatten() / np.linalg.norm(image), list(range(n)))
+        return qc
+    if encoding == "amplitude_tree":
+        return get_template("amplitude", size, optimization_level=0).circuit
+    raise ValueError(f"Unknown encoding: {encoding}")
+
+
+def validate(sizes=(2, 4, 8), n_bits=3, seed=0):
+    """
+    Compare estimates with real builds, transpiled to cx + u. Returns the
+    rows that disagree (exact fields must match, bounded depths may not
+    be exceeded).
+    """
+    from qiskit import transpile
+
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    for size in sizes:
+        image = rng.uniform(0.05, 1.0, (size, size))
+        for encoding in ESTIMATORS:
+            est = estimate(encoding, size, n_bits, image=image)
+            qc = _build(encoding, image, n_bits)
+            compiled = transpile(qc, basis_gates=["cx", "u"], optimization_level=0)
+            real = {
+                "qubits": qc.num_qubits,
+                "gates": qc.size(),
+                "depth": qc.depth(),
+                "basis_gates": compiled.size(),
+                "basis_depth": compiled.depth(),
+                "cx": compiled.count_ops().get("cx", 0),
+            }
+            for field, value in real.items():
+                if "depth" in field and not est["exact_depth"]:
+                    ok = value <= est[field]
+                else:
+                    ok = value == est[field]
+                if not ok:
+                    mismatches.append((encoding, size, field, est[field], value))
+    return mismatches
+
+
+if __name__ == "__main__":
+    start = time.time()
+    table = sweep()
+    elapsed = time.time() - start
+
+    print(f"{'encoding':<15} {'size':>10} {'qubits':>6} {'basis gates':>14} {'cx':>14} {'depth':>14}")
+    for encoding, rows in table.items():
+        for size in (2, 64, 512, 4096):
+            r = rows[size]
+            print(f"{encoding:<15} {size:>4}x{size:<5} {r['qubits']:>6} "
+                  f"{r['basis_gates']:>14} {r['cx']:>14} {r['basis_depth']:>14}")
+    print(f"Swept {sum(len(r) for r in table.values())} estimates in {elapsed:.4f} s")
+
+    mismatches = validate()
+    print("Validated against real builds:", "ok" if not mismatches else mismatches)
@@ -0,0 +1,192 @@
+import time
+import numpy as np
+from math import pi
+
+from frqi_statevector import as_batch, bit_reverse_indices, position_qubits
+from neqr_sparse import quantize
+import decoding
+
+MAX_DENSE_QUBITS = 26
+
+# ===============================
+# RNG STREAMS
+# ===============================
+def rng_streams(seed, n):
+    """
+    One independent generator per image, spawned from seed: a given seed
+    and batch order always reproduce the same counts, and no two images
+    share a stream.
+    """
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n)]
+
+# ===============================
+# SAMPLERS
+# ===============================
+# All samplers return histograms (the counts format decoding.py reads):
+# int64 arrays of shape (2^q,) for one image or (B, 2^q) for a batch,
+# indexed like the statevector. Shots are drawn with one multinomial per
+# image, so the cost depends on 2^q and not on the number of shots.
+def sample_counts(probs, shots, seed=None):
+    """
+    Counts for arbitrary probability vectors, shape (2^q,) or (B, 2^q).
+    multinomial needs float64, so rows are widened one at a time.
+    """
+    probs = np.asarray(probs)
+    batch = probs.reshape(-1, probs.shape[-1])
+    counts = np.empty(batch.shape, dtype=np.int64)
+    for i, rng in enumerate(rng_streams(seed, batch.shape[0])):
+        p = batch[i].astype(np.float64)
+        counts[i] = rng.multinomial(shots, p / p.sum())
+    return counts.reshape(probs.shape)
+
+
+def sample_frqi(images, shots, seed=None):
+    """
+    FRQI shots without building the 2N probability vector: positions are
+    uniform, so draw a multinomial over positions and then the colour
+    qubit per position with P(1) = sin^2(pi/2 * pixel).
+    """
+    batch, single = as_batch(images)
+    n_images, n_pixels = batch.shape[0], batch[0].size
+    uniform = np.full(n_pixels, 1.0 / n_pixels)
+    p_one = np.sin(batch.reshape(n_images, n_pixels) * (pi / 2)) ** 2
+    p_one = p_one[:, bit_reverse_indices(position_qubits(n_pixels))]
+
+    counts = np.empty((n_images, 2 * n_pixels), dtype=np.int64)
+    for i, rng in enumerate(rng_streams(seed, n_images)):
+        per_position = rng.multinomial(shots, uniform)
+        ones = rng.binomial(per_position, p_one[i])
+        counts[i, :n_pixels] = per_position - ones
+        counts[i, n_pixels:] = ones
+    return counts[0] if single else counts
+
+
+def sample_mcqi(images, shots, seed=None):
+    """
+    MCQI shots: (channel, position) pairs are uniform, then the colour
+    qubit is drawn per pair as in sample_frqi. images are (H, W, 3|4)
+    or (B, H, W, 3|4); histograms have 8 * H * W entries.
+    """
+    from mcqi import mcqi_channels
+
+    channels, single = mcqi_channels(images)
+    n_images = channels.shape[0]
+    n_pairs = channels.shape[1] * channels.shape[2]
+    rev = bit_reverse_indices(position_qubits(channels.shape[2]))
+    uniform = np.full(n_pairs, 1.0 / n_pairs)
+    p_one = (np.sin(channels[:, :, rev] * (pi / 2)) ** 2).reshape(n_images, n_pairs)
+
+    counts = np.empty((n_images, 2 * n_pairs), dtype=np.int64)
+    for i, rng in enumerate(rng_streams(seed, n_images)):
+        per_pair = rng.multinomial(shots, uniform)
+        ones = rng.binomial(per_pair, p_one[i])
+        counts[i, :n_pairs] = per_pair - ones
+        counts[i, n_pairs:] = ones
+    return counts[0] if single else counts
+
+
+def sample_neqr(images, shots, n_bits=2, seed=None):
+    """
+    NEQR shots: every position carries exactly one intensity code, so only
+    the position is random. For registers too large to histogram densely
+    use SparseNEQRState.sample, which returns per-position counts.
+    """
+    batch, single = as_batch(images)
+    n_images, n_pixels = batch.shape[0], batch[0].size
+    n = position_qubits(n_pixels)
+    if n + n_bits > MAX_DENSE_QUBITS:
+        raise ValueError(f"{n + n_bits} qubits is too large for dense counts; "
+                         f"use SparseNEQRState.sample")
+    uniform = np.full(n_pixels, 1.0 / n_pixels)
+    rev = bit_reverse_indices(n)
+    codes = quantize(batch.reshape(n_images, n_pixels), n_bits).astype(np.int64)[:, rev]
+    index = (codes << n) | np.arange(n_pixels)
+
+    counts = np.zeros((n_images, n_pixels << n_bits), dtype=np.int64)
+    for i, rng in enumerate(rng_streams(seed, n_images)):
+        counts[i, index[i]] = rng.multinomial(shots, uniform)
+    return counts[0] if single else counts
+
+
+def sample_amplitude(images, shots, seed=None):
+    """
+    Amplitude encoding shots: P(i) = pixel_i^2 / ||image||^2.
+    """
+    batch, single = as_batch(images)
+    flat = batch.reshape(batch.shape[0], -1) ** 2
+    if np.any(flat.sum(axis=1) == 0):
+        raise ValueError("Cannot amplitude-encode an all-zero image")
+    counts = sample_counts(flat, shots, seed)
+    return counts[0] if single else counts
+
+
+SAMPLERS = {
+    "frqi": sample_frqi,
+    "neqr": sample_neqr,
+    "mcqi": sample_mcqi,
+    "amplitude": sample_amplitude,
+}
+
+
+def sample(encoding, images, shots, seed=None, n_bits=2):
+    if encoding not in SAMPLERS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    if encoding == "neqr":
+        return sample_neqr(images, shots, n_bits, seed)
+    return SAMPLERS[encoding](images, shots, seed)
+
+
+def decode(encoding, counts, shape, n_bits=2):
+    if encoding == "frqi":
+        return decoding.decode_frqi(counts, shape)
+    if encoding == "neqr":
+        return decoding.decode_neqr(counts, shape, n_bits)
+    if encoding == "mcqi":
+        return decoding.decode_mcqi(counts, shape)
+    return decoding.decode_amplitude(counts, shape)
+
+# ===============================
+# FIDELITY VS SHOTS
+# ===============================
+def fidelity_vs_shots(images, encoding, shots_list, seed=0, n_bits=2):
+    """
+    {shots: fidelity_report} for a batch of images. Amplitude-encoded
+    images are compared after normalising them to unit norm, since the
+    encoding does not keep the norm. MCQI batches are (B, H, W, 3) and
+    report one entry per image and channel.
+    """
+    if encoding == "mcqi":
+        batch = np.asarray(images).reshape((-1,) + np.shape(images)[-3:])
+        shape = batch.shape[1:3]
+    else:
+        batch, _ = as_batch(images)
+        shape = batch.shape[1:]
+    reference = batch
+    if encoding == "amplitude":
+        norms = np.linalg.norm(batch.reshape(batch.shape[0], -1), axis=1)
+        reference = batch / norms[:, np.newaxis, np.newaxis]
+
+    def planes(x):
+        return np.moveaxis(x, -1, 1).reshape((-1,) + shape) if encoding == "mcqi" else x
+
+    sweep = {}
+    for shots in shots_list:
+        counts = sample(encoding, batch, shots, seed, n_bits)
+        decoded = decode(encoding, counts, shape, n_bits)
+        sweep[shots] = decoding.fidelity_report(planes(reference), planes(decoded))
+    return sweep
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    images = rng.random((32, 32, 32))
+    rgb = rng.random((32, 32, 32, 3))
+
+    for encoding in SAMPLERS:
+        start = time.time()
+        sweep = fidelity_vs_shots(rgb if encoding == "mcqi" else images, encoding,
+                                  (1_000, 100_000, 10_000_000), n_bits=4)
+        print(f"{encoding} ({time.time() - start:.2f} s for 32 images x 3 shot counts)")
+        for shots, report in sweep.items():
+            print(f"  {shots:>10} shots  psnr {report['psnr'].mean():7.2f}  "
+                  f"ssim {report['ssim'].mean():.4f}")
@@ -3,6 +3,8 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
+from precision import to_unit
+
 # -----------------------------
 # Paths (SAFE FOR WINDOWS)
 # -----------------------------
@@ -28,7 +30,7 @@ if img is None:
 # Resize + normalize
 # -----------------------------
 img = cv2.resize(img, (128, 128))
-norm_img = img / 255.0
+norm_img = to_unit(img)
 
 # -----------------------------
 # Simulated quantum processing
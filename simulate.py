@@ -1,10 +1,11 @@
 import os
-import cv2
 import numpy as np
 from math import pi
 from qiskit import QuantumCircuit
-from qiskit_aer import AerSimulator
-from qiskit.visualization import circuit_drawer
+
+from circuit_render import Renderer
+from preprocessing import preprocess_image
+from tracing import span
 
 # ===============================
 # CONFIG
@@ -19,25 +20,20 @@ DATASETS = {
 
 IMAGE_SIZE = 2  # 2x2 image (mandatory for quantum feasibility)
 
-os.makedirs("outputs", exist_ok=True)
-
 # ===============================
 # IMAGE PREPROCESSING
 # ===============================
 def load_and_preprocess(image_path):
-    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    if img is None:
+    try:
+        return preprocess_image(image_path, IMAGE_SIZE)  # normalize [0,1]
+    except FileNotFoundError:
         return None
 
-    img = cv2.resize(img, (IMAGE_SIZE, IMAGE_SIZE))
-    img = img / 255.0  # normalize [0,1]
-    return img
-
 # ===============================
 # FRQI IMPLEMENTATION
 # ===============================
 def frqi_circuit(image):
-    n_pixels = IMAGE_SIZE * IMAGE_SIZE
+    n_pixels = image.size
     n_pos_qubits = int(np.log2(n_pixels))
     qc = QuantumCircuit(n_pos_qubits + 1)
 
@@ -66,17 +62,16 @@ def frqi_circuit(image):
 # ===============================
 # NEQR (SIMPLIFIED VERSION)
 # ===============================
-def neqr_circuit(image):
-    n_pixels = IMAGE_SIZE * IMAGE_SIZE
+def neqr_circuit(image, n_intensity_qubits=2):
+    n_pixels = image.size
     n_pos_qubits = int(np.log2(n_pixels))
-    n_intensity_qubits = 2  # simplified intensity bits
 
     qc = QuantumCircuit(n_pos_qubits + n_intensity_qubits)
 
     for i in range(n_pos_qubits):
         qc.h(i)
 
-    pixel_values = (image.flatten() * 3).astype(int)
+    pixel_values = (image.flatten() * (2 ** n_intensity_qubits - 1)).astype(int)
 
     for idx, val in enumerate(pixel_values):
         bin_idx = format(idx, f'0{n_pos_qubits}b')
@@ -98,42 +93,51 @@ def neqr_circuit(image):
 # ===============================
 # MAIN PIPELINE
 # ===============================
-simulator = AerSimulator()
+def main():
+    from aer_executor import AerExecutor
 
-with open("outputs/output.txt", "w") as f:
+    os.makedirs("outputs", exist_ok=True)
+
+    # Build every circuit first, then simulate the whole batch at once
+    circuits = {}
     for name, path in DATASETS.items():
         print(f"Processing dataset: {name}")
 
         img = load_and_preprocess(path)
         if img is None:
             print(f"Image not found for {name}")
-            f.write(f"{name}: Image not found\n")
+            circuits[name] = None
             continue
 
-        # ---- FRQI ----
-        frqi = frqi_circuit(img)
-        frqi_result = simulator.run(frqi).result()
-
-        circuit_drawer(
-            frqi,
-            output="mpl",
-            filename=f"outputs/frqi_{name}.png"
-        )
-
-        # ---- NEQR ----
-        neqr = neqr_circuit(img)
-        neqr_result = simulator.run(neqr).result()
-
-        circuit_drawer(
-            neqr,
-            output="mpl",
-            filename=f"outputs/neqr_{name}.png"
-        )
-
-        f.write(f"{name}:\n")
-        f.write(f"  FRQI depth: {frqi.depth()}\n")
-        f.write(f"  FRQI qubits: {frqi.num_qubits}\n")
-        f.write(f"  NEQR depth: {neqr.depth()}\n")
-        f.write(f"  NEQR qubits: {neqr.num_qubits}\n\n")
-
-print("All datasets processed successfully.")
+        with span("build", items=2, dataset=name):
+            circuits[name] = (frqi_circuit(img), neqr_circuit(img))
+
+    found = {name: pair for name, pair in circuits.items() if pair is not None}
+    if found:
+        AerExecutor().run_encodings({
+            "frqi": [frqi for frqi, _ in found.values()],
+            "neqr": [neqr for _, neqr in found.values()],
+        })
+
+    # Circuit images are drawn in the background and written on exit
+    with Renderer() as renderer, open("outputs/output.txt", "w") as f:
+        for name, pair in circuits.items():
+            if pair is None:
+                f.write(f"{name}: Image not found\n")
+                continue
+
+            frqi, neqr = pair
+            renderer.submit(frqi, f"outputs/frqi_{name}.png")
+            renderer.submit(neqr, f"outputs/neqr_{name}.png")
+
+            f.write(f"{name}:\n")
+            f.write(f"  FRQI depth: {frqi.depth()}\n")
+            f.write(f"  FRQI qubits: {frqi.num_qubits}\n")
+            f.write(f"  NEQR depth: {neqr.depth()}\n")
+            f.write(f"  NEQR qubits: {neqr.num_qubits}\n\n")
+
+    print("All datasets processed successfully.")
+
+
+if __name__ == "__main__":
+    main()
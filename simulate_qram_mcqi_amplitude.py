@@ -1,8 +1,10 @@
 import os
-import cv2
-import numpy as np
-import matplotlib.pyplot as plt
-from qiskit import QuantumCircuit
+
+from amplitude_prep import amplitude_circuit
+from circuit_render import Renderer, render_circuit
+from mcqi import mcqi_circuit
+from preprocessing import preprocess_image
+from qram import QRAM
 
 # ==============================
 # DATASET PATHS (MATCH YOUR DATA FOLDER)
@@ -16,90 +18,58 @@ DATASETS = {
 }
 
 OUTPUT_DIR = "outputs"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# ==============================
-# IMAGE PREPROCESSING
-# ==============================
-def preprocess_image(path, rgb=False):
-    img = cv2.imread(path)
 
-    if img is None:
-        raise FileNotFoundError(f"[ERROR] Image not found at: {path}")
 
-    if not rgb:
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-    img = cv2.resize(img, (2, 2))
-    img = img / 255.0
-    return img
+def _render(qc, filename, renderer):
+    # Queue on a background Renderer when given, else draw now (cached)
+    if renderer is not None:
+        renderer.submit(qc, filename)
+    else:
+        render_circuit(qc, filename)
 
 # ==============================
 # QRAM ENCODING
 # ==============================
-def qram_encode(image, dataset_name):
-    pixels = image.flatten()
-    qc = QuantumCircuit(3)
-
-    for idx, value in enumerate(pixels):
-        binary = format(idx, "02b")
-
-        if binary[0] == "1":
-            qc.x(0)
-        if binary[1] == "1":
-            qc.x(1)
+def qram_encode(image, dataset_name, renderer=None):
+    qc = QRAM.from_image(image).circuit(superpose=True)
 
-        qc.ry(2 * np.arcsin(value), 2)
-
-        if binary[0] == "1":
-            qc.x(0)
-        if binary[1] == "1":
-            qc.x(1)
-
-    qc.draw("mpl")
-    plt.savefig(f"{OUTPUT_DIR}/qram_{dataset_name}.png")
-    plt.close()
+    _render(qc, f"{OUTPUT_DIR}/qram_{dataset_name}.png", renderer)
 
 # ==============================
 # MCQI ENCODING
 # ==============================
-def mcqi_encode(image, dataset_name):
-    r, g, b = image[0, 0]
+def mcqi_encode(image, dataset_name, renderer=None):
+    qc = mcqi_circuit(image)
 
-    qc = QuantumCircuit(3)
-    qc.ry(2 * np.arcsin(r), 0)
-    qc.ry(2 * np.arcsin(g), 1)
-    qc.ry(2 * np.arcsin(b), 2)
-
-    qc.draw("mpl")
-    plt.savefig(f"{OUTPUT_DIR}/mcqi_{dataset_name}.png")
-    plt.close()
+    _render(qc, f"{OUTPUT_DIR}/mcqi_{dataset_name}.png", renderer)
 
 # ==============================
 # AMPLITUDE ENCODING
 # ==============================
-def amplitude_encode(image, dataset_name):
-    vec = image.flatten()
-    vec = vec / np.linalg.norm(vec)
-
-    qc = QuantumCircuit(2)
-    qc.initialize(vec, [0, 1])
+def amplitude_encode(image, dataset_name, renderer=None):
+    qc = amplitude_circuit(image)
 
-    qc.draw("mpl")
-    plt.savefig(f"{OUTPUT_DIR}/amplitude_{dataset_name}.png")
-    plt.close()
+    _render(qc, f"{OUTPUT_DIR}/amplitude_{dataset_name}.png", renderer)
 
 # ==============================
 # MAIN PIPELINE (DATASET LOOP)
 # ==============================
-for dataset, img_path in DATASETS.items():
-    print(f"Processing {dataset}")
+def main():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    with Renderer() as renderer:
+        for dataset, img_path in DATASETS.items():
+            print(f"Processing {dataset}")
+
+            gray_img = preprocess_image(img_path)
+            rgb_img = preprocess_image(img_path, rgb=True)
+
+            qram_encode(gray_img, dataset, renderer)
+            mcqi_encode(rgb_img, dataset, renderer)
+            amplitude_encode(gray_img, dataset, renderer)
 
-    gray_img = preprocess_image(img_path)
-    rgb_img = preprocess_image(img_path, rgb=True)
+    print("✅ QRAM, MCQI, and Amplitude Encoding completed for all datasets.")
 
-    qram_encode(gray_img, dataset)
-    mcqi_encode(rgb_img, dataset)
-    amplitude_encode(gray_img, dataset)
 
-print("✅ QRAM, MCQI, and Amplitude Encoding completed for all datasets.")
+if __name__ == "__main__":
+    main()
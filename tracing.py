@@ -0,0 +1,378 @@
+import os
+import sys
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# Standard library only: every pipeline module imports this, including
+# the light cli commands that must stay within their startup budget.
+
+TRACE_ENV = "QIR_TRACE"      # path of a Chrome trace written at exit
+PROFILE_ENV = "QIR_PROFILE"  # stage to run under cProfile
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _peak_rss():
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+# ===============================
+# SPANS
+# ===============================
+class _NullSpan:
+    """
+    What span() returns while tracing is off: one shared object whose
+    methods do nothing.
+    """
+
+    def add(self, n=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    One timed stage: wall time, process CPU time (all threads, so
+    cpu / wall above 1 means the stage ran in parallel), the peak RSS at
+    its end and how much the stage raised it, and an item count.
+    """
+
+    __slots__ = ("tracer", "name", "items", "args", "_start", "_cpu", "_rss", "_profiling")
+
+    def __init__(self, tracer, name, items, args):
+        self.tracer = tracer
+        self.name = name
+        self.items = items
+        self.args = args
+
+    def add(self, n=1):
+        self.items += n
+
+    def __enter__(self):
+        self._rss = _peak_rss()
+        self._cpu = time.process_time_ns()
+        self._start = time.perf_counter_ns()
+        # Last in, first out, so the profile holds only the stage itself
+        self._profiling = self.tracer._start_profile(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiling:
+            self.tracer._stop_profile()
+        end = time.perf_counter_ns()
+        cpu = time.process_time_ns() - self._cpu
+        rss = _peak_rss()
+        self.tracer._record(self, end, cpu, rss)
+        return False
+
+# ===============================
+# TRACER
+# ===============================
+class Tracer:
+    """
+    Collects finished spans as Chrome trace "complete" events. With
+    profile set, spans of that stage also run under one cProfile.Profile
+    (the outermost one, on the thread that entered it).
+    """
+
+    def __init__(self, profile=None):
+        self.events = []
+        self.profile = profile
+        self.profiler = None
+        self.worker_profiles = []  # marshalled pstats data from traced_call
+        self._profile_thread = None
+
+    def _start_profile(self, name):
+        if name != self.profile or self._profile_thread is not None:
+            return False
+        if self.profiler is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+        self._profile_thread = threading.get_ident()
+        self.profiler.enable()
+        return True
+
+    def _stop_profile(self):
+        self.profiler.disable()
+        self._profile_thread = None
+
+    def _record(self, span, end, cpu, rss):
+        args = dict(span.args)
+        args.update(cpu_us=cpu / 1e3, items=span.items, peak_rss=rss,
+                    rss_growth=max(rss - span._rss, 0))
+        # perf_counter is system-wide, so worker timestamps line up
+        self.events.append({
+            "name": span.name,
+            "ph": "X",
+            "ts": span._start / 1e3,
+            "dur": (end - span._start) / 1e3,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+
+_tracer = None
+
+
+def enable(profile=None):
+    """
+    Start recording spans, replacing any current tracer.
+    """
+    global _tracer
+    _tracer = Tracer(profile)
+    return _tracer
+
+
+def disable():
+    """
+    Stop recording. Returns the tracer that was active, or None.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, items=0, **args):
+    """
+    with span("transpile", items=len(circuits), method=method) as s: ...
+
+    Costs one global lookup and returns a shared no-op span while tracing
+    is off. s.add(n) counts items processed inside the block.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return Span(_tracer, name, items, args)
+
+
+@contextmanager
+def collect():
+    """
+    Yield a list that receives the spans finished inside the block
+    instead of the tracer, for a worker to send back to the parent
+    (see merge()). The list stays empty while tracing is off.
+    """
+    if _tracer is None:
+        yield []
+        return
+    previous, _tracer.events = _tracer.events, []
+    try:
+        yield _tracer.events
+    finally:
+        _tracer.events = previous
+
+
+def merge(events, profile=None):
+    """
+    Add spans collected elsewhere, e.g. in worker processes, and the
+    worker's profile of the profiled stage if it sent one.
+    """
+    if _tracer is not None:
+        _tracer.events.extend(events)
+        if profile is not None:
+            _tracer.worker_profiles.append(profile)
+
+
+def traced_call(fn, *args):
+    """
+    fn(*args) -> (result, spans, profile) for work submitted to a process
+    pool; the parent passes spans and profile to merge(). profile is the
+    marshalled pstats data of the profiled stage's spans inside this
+    call, or None.
+    """
+    with collect() as events:
+        result = fn(*args)
+    profile = None
+    if _tracer is not None and _tracer.profiler is not None:
+        import marshal
+        _tracer.profiler.create_stats()
+        profile = marshal.dumps(_tracer.profiler.stats)
+        # Each call sends only its own profile
+        _tracer.profiler = None
+    return result, events, profile
+
+
+def pool_initializer():
+    """
+    initializer for a process pool: enable in the workers, with the same
+    profiled stage, when tracing is on here, else None. Workers then
+    record whatever the start method.
+    """
+    if _tracer is None:
+        return None
+    return partial(enable, _tracer.profile)
+
+# ===============================
+# REPORTS
+# ===============================
+def _events(events):
+    if events is not None:
+        return events
+    return _tracer.events if _tracer is not None else []
+
+
+def export_chrome(path, events=None):
+    """
+    Write a Chrome trace (chrome://tracing, Perfetto) with one row per
+    process and thread.
+    """
+    import json
+
+    events = _events(events)
+    main_pid = os.getpid()
+    meta = [{"name": "process_name", "ph": "M", "pid": pid,
+             "args": {"name": "main" if pid == main_pid else f"worker {pid}"}}
+            for pid in sorted({e["pid"] for e in events})]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": meta + list(events), "displayTimeUnit": "ms"}, f)
+    return path
+
+
+def summary(events=None):
+    """
+    {stage: {"calls", "items", "wall", "cpu", "peak_rss", "rss_growth"}}
+    with times in seconds and memory in bytes, slowest stage first.
+    Nested stages are counted in full in each enclosing stage as well.
+    """
+    stages = {}
+    for e in _events(events):
+        s = stages.setdefault(e["name"], {"calls": 0, "items": 0, "wall": 0.0, "cpu": 0.0,
+                                          "peak_rss": 0, "rss_growth": 0})
+        args = e["args"]
+        s["calls"] += 1
+        s["items"] += args["items"]
+        s["wall"] += e["dur"] / 1e6
+        s["cpu"] += args["cpu_us"] / 1e6
+        s["peak_rss"] = max(s["peak_rss"], args["peak_rss"])
+        s["rss_growth"] = max(s["rss_growth"], args["rss_growth"])
+    return dict(sorted(stages.items(), key=lambda kv: -kv[1]["wall"]))
+
+
+def format_summary(events=None):
+    rows = summary(events)
+    lines = [f"{'stage':<20} {'calls':>7} {'items':>9} {'wall s':>9} {'cpu s':>9} "
+             f"{'cpu/wall':>8} {'items/s':>10} {'peak MB':>8} {'+MB':>7}"]
+    for name, s in rows.items():
+        ratio = s["cpu"] / s["wall"] if s["wall"] else 0.0
+        rate = f"{s['items'] / s['wall']:.0f}" if s["items"] and s["wall"] else "-"
+        lines.append(f"{name:<20} {s['calls']:>7} {s['items']:>9} {s['wall']:>9.3f} "
+                     f"{s['cpu']:>9.3f} {ratio:>8.2f} {rate:>10} "
+                     f"{s['peak_rss'] / 2**20:>8.1f} {s['rss_growth'] / 2**20:>7.1f}")
+    return "\n".join(lines)
+
+
+class _WorkerProfile:
+    # pstats.Stats loads any object with create_stats() and .stats
+    def __init__(self, data):
+        import marshal
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+def profile_report(limit=25, sort="cumulative"):
+    """
+    pstats listing of the profiled stage, here and in pool workers
+    combined, or None if it never ran.
+    """
+    if _tracer is None:
+        return None
+    sources = [_WorkerProfile(data) for data in _tracer.worker_profiles]
+    if _tracer.profiler is not None:
+        sources.insert(0, _tracer.profiler)
+    if not sources:
+        return None
+    import io
+    import pstats
+
+    out = io.StringIO()
+    pstats.Stats(*sources, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def report(path=None, stream=None):
+    """
+    Print the summary table (and the profile, if any) to stream, stderr
+    by default, and write a Chrome trace to path if given.
+    """
+    stream = stream or sys.stderr
+    if path:
+        export_chrome(path)
+        print(f"Chrome trace written to {path}", file=stream)
+    print(format_summary(), file=stream)
+    profile = profile_report()
+    if profile:
+        print(f"\ncProfile of stage '{_tracer.profile}':\n{profile}", file=stream)
+
+
+def _report_at_exit(path):
+    # Spawned workers re-import this module with the same environment
+    import multiprocessing
+    if _tracer is not None and multiprocessing.parent_process() is None:
+        report(path)
+
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ.get(PROFILE_ENV))
+    atexit.register(_report_at_exit, os.environ[TRACE_ENV])
+
+
+if __name__ == "__main__":
+    import numpy as np
+
+    def _cost(n=1_000_000):
+        # Per-span overhead above an empty loop
+        start = time.perf_counter()
+        for _ in range(n):
+            pass
+        empty = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(n):
+            with span("noop", items=1):
+                pass
+        return (time.perf_counter() - start - empty) / n * 1e9
+
+    print(f"span while disabled: {_cost():.0f} ns")
+    enable()
+    print(f"span while enabled:  {_cost(200_000):.0f} ns")
+
+    enable(profile="sort")
+    rng = np.random.default_rng(0)
+    with span("pipeline"):
+        with span("generate") as s:
+            batches = [rng.random((512, 512)) for _ in range(8)]
+            s.add(len(batches))
+        for batch in batches:
+            with span("matmul", items=1):
+                batch @ batch
+        with span("sort", items=sum(b.size for b in batches)):
+            [np.sort(b, axis=None) for b in batches]
+    report("outputs/trace_demo.json", stream=sys.stdout)